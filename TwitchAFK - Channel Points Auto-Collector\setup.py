@@ -1,22 +1,1724 @@
+import time
+STARTED_AT = time.perf_counter()
+
 import os
+import re
+import sys
+import argparse
 import json
+import base64
+import hashlib
+import struct
+import random
+import asyncio
+import sqlite3
 import zipfile
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+import statistics
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from contextlib import contextmanager
 import threading
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-class TwitchPointsManager:
+# Every element the page scripts look for, in one place for when Twitch
+# changes its markup
+SELECTORS = {
+    'claim_button': '[aria-label="Claim Bonus"]',
+    'balance': '[data-test-selector="balance-string"]',
+    'live_indicator': '.live-indicator-container, [data-a-target="animated-channel-viewers-count"]',
+    'offline': '[data-a-target="player-overlay-offline"], .offline-embeds',
+    'video': 'video'
+}
+
+# Shared by the page scripts. Balances are shown abbreviated once they get
+# large ("12.3K", "1.2M"), so digits alone are not enough.
+PAGE_HELPERS = """
+    const selectors = __SELECTORS__;
+    const parseBalance = text => {
+        const match = (text || '').replace(/[\\s,]/g, '').match(/(\\d+(?:\\.\\d+)?)([KkMm]?)/);
+        if (!match) return null;
+        const scale = { k: 1e3, m: 1e6 }[match[2].toLowerCase()] || 1;
+        return Math.round(parseFloat(match[1]) * scale);
+    };
+    const readBalance = () => {
+        const element = document.querySelector(selectors.balance);
+        return element ? parseBalance(element.textContent) : null;
+    };
+"""
+
+def page_script(source):
+    return source.replace('__PAGE_HELPERS__',
+        PAGE_HELPERS.replace('__SELECTORS__', json.dumps(SELECTORS)))
+
+# Installed into every watcher page before Twitch's own scripts run. It clicks
+# the bonus button as soon as it is added to the DOM and queues a claim event
+# for the Python side, which either blocks on it (execute_async_script) or
+# receives it through a CDP binding when one is registered.
+CLAIM_OBSERVER_SCRIPT = page_script("""
+(() => {
+    if (window.__twitchAfk) return;
+    const state = window.__twitchAfk = { events: [], waiters: [] };
+    const clicked = new WeakSet();
+    __PAGE_HELPERS__
+
+    const report = event => {
+        event.time = Date.now();
+        state.events.push(event);
+        if (typeof window.twitchAfkBinding === 'function') {
+            window.twitchAfkBinding(JSON.stringify(event));
+        }
+        state.waiters.splice(0).forEach(wake => wake());
+    };
+
+    // Calls back once, with the queued events as soon as there are any or
+    // with none after `timeout` ms. A waiter that timed out is dropped, so a
+    // later claim isn't handed to a caller that stopped listening.
+    state.wait = (timeout, callback) => {
+        if (state.events.length || !timeout) return callback(state.events.splice(0));
+        const waiter = () => {
+            clearTimeout(timer);
+            callback(state.events.splice(0));
+        };
+        const timer = setTimeout(() => {
+            const index = state.waiters.indexOf(waiter);
+            if (index !== -1) state.waiters.splice(index, 1);
+            callback(state.events.splice(0));
+        }, timeout);
+        state.waiters.push(waiter);
+    };
+
+    const tryClaim = () => {
+        const button = document.querySelector(selectors.claim_button);
+        if (!button || clicked.has(button)) return;
+        clicked.add(button);
+        const seen = Date.now();
+        button.click();
+        // Give the balance a moment to include the bonus
+        setTimeout(() => report({ type: 'claim', seen: seen, balance: readBalance() }), 1500);
+    };
+
+    new MutationObserver(tryClaim).observe(document, { childList: true, subtree: true });
+    document.addEventListener('DOMContentLoaded', tryClaim);
+})();
+""")
+
+# Set volume to 5%
+VOLUME_SCRIPT = """
+    const video = document.querySelector('video');
+    if (video) {
+        video.volume = 0.05;
+        video.muted = false;
+    }
+"""
+
+# Pins the Twitch player to its lowest rendition before it loads and strips
+# page animations, so a watcher decodes and paints as little as possible
+# while the stream keeps playing for watch-time purposes
+LOW_RESOURCE_SCRIPT = """
+(() => {
+    try {
+        localStorage.setItem('video-quality', JSON.stringify({ default: '160p30' }));
+    } catch (e) {}
+    const style = document.createElement('style');
+    style.textContent = '*, *::before, *::after { animation: none !important; transition: none !important; }';
+    const attach = () => (document.head || document.documentElement).appendChild(style);
+    if (document.documentElement) attach();
+    else document.addEventListener('DOMContentLoaded', attach);
+})();
+"""
+
+# Media bytes consumed and frame counters of the channel's player
+PLAYBACK_STATS_SCRIPT = """
+    const video = document.querySelector('video');
+    if (!video) return null;
+    const quality = video.getVideoPlaybackQuality ? video.getVideoPlaybackQuality() : {};
+    return {
+        height: video.videoHeight,
+        playing: !video.paused && !video.ended,
+        media_bytes: (video.webkitVideoDecodedByteCount || 0) + (video.webkitAudioDecodedByteCount || 0),
+        frames: quality.totalVideoFrames || 0,
+        dropped_frames: quality.droppedVideoFrames || 0
+    };
+"""
+
+# Requests a watcher page never needs: chat, emotes, avatars, thumbnails of
+# recommended channels, fonts and ad/tracking scripts. The player, GQL,
+# pubsub (which delivers bonuses) and spade (watch time) are left alone.
+BLOCKED_URLS = [
+    '*://irc-ws.chat.twitch.tv/*',
+    '*://irc-ws-r.chat.twitch.tv/*',
+    '*://static-cdn.jtvnw.net/emoticons/*',
+    '*://static-cdn.jtvnw.net/badges/*',
+    '*://static-cdn.jtvnw.net/jtv_user_pictures/*',
+    '*://static-cdn.jtvnw.net/previews-ttv/*',
+    '*://static-cdn.jtvnw.net/ttv-boxart/*',
+    '*://*.amazon-adsystem.com/*',
+    '*://*.doubleclick.net/*',
+    '*://*.imasdk.googleapis.com/*',
+    '*://*.google-analytics.com/*',
+    '*://*.googletagmanager.com/*',
+    '*://*.scorecardresearch.com/*',
+    '*://*.branch.io/*'
+]
+
+# Matched by type through Fetch interception, so images and fonts are caught
+# whatever their URL looks like
+BLOCKED_RESOURCE_TYPES = ['Image', 'Font']
+
+def fetch_patterns(resource_types):
+    return [{'resourceType': resource_type, 'requestStage': 'Request'} for resource_type in resource_types]
+
+# Stops the chat list from rendering; the points summary and Claim Bonus
+# button below it stay in the page
+HIDE_CHAT_SCRIPT = """
+(() => {
+    const style = document.createElement('style');
+    style.textContent = '.chat-scrollable-area__message-container, .chat-list--default { display: none !important; }';
+    const attach = () => (document.head || document.documentElement).appendChild(style);
+    if (document.documentElement) attach();
+    else document.addEventListener('DOMContentLoaded', attach);
+})();
+"""
+
+# Page traffic is counted from the tab's CDP Network events. Resource timing
+# reports a transferSize of 0 for cross-origin responses without
+# Timing-Allow-Origin, which is nearly everything a Twitch page loads.
+def count_network_event(totals, method, params):
+    """Tally one CDP Network event into requests, bytes and blocked counts"""
+    if method == 'Network.loadingFinished':
+        totals['requests'] += 1
+        totals['bytes'] += params.get('encodedDataLength', 0)
+    elif method == 'Network.loadingFailed' and (
+            params.get('blockedReason') or params.get('errorText') == 'net::ERR_BLOCKED_BY_CLIENT'):
+        # setBlockedURLs sets a reason, requests failed through Fetch don't
+        totals['blocked'] += 1
+
+# The whole per-check conversation with a page in one async script: waits up
+# to the timeout (ms) for a claim, then resolves with a snapshot of the claim,
+# balance, stream and player state. With the observer installed it collects
+# the observer's claim events, otherwise it clicks the button itself.
+PAGE_PROBE_SCRIPT = page_script("""
+const timeout = arguments[0];
+const done = arguments[arguments.length - 1];
+__PAGE_HELPERS__
+const observer = window.__twitchAfk;
+const last = window.__twitchAfkProbe = window.__twitchAfkProbe || {};
+
+const snapshot = claims => {
+    const video = document.querySelector(selectors.video);
+    const offline = !!document.querySelector(selectors.offline);
+    const playing = !!video && !video.paused && !video.ended;
+    // Playing but starved, or the clock hasn't moved since the last probe
+    const stalled = playing && (video.readyState < 3 ||
+        (video.currentTime === last.time && Date.now() - last.at > 1000));
+    last.time = video ? video.currentTime : null;
+    last.at = Date.now();
+    return {
+        claims: claims,
+        observer: !!observer,
+        claim_button: !!document.querySelector(selectors.claim_button),
+        balance: readBalance(),
+        live: !offline && !!document.querySelector(selectors.live_indicator),
+        offline: offline,
+        playing: playing && !stalled,
+        stalled: stalled,
+        url: location.href
+    };
+};
+
+if (observer) {
+    // The observer drops this wait on timeout, so claims can't go to a stale probe
+    return observer.wait(timeout, events => done(snapshot(events)));
+}
+
+const claim = button => {
+    button.click();
+    // Give the balance a moment to include the bonus
+    setTimeout(() => done(snapshot([{ type: 'claim', balance: readBalance() }])), 1500);
+};
+const button = document.querySelector(selectors.claim_button);
+if (button) return claim(button);
+if (!timeout) return done(snapshot([]));
+const timer = setTimeout(() => {
+    watcher.disconnect();
+    done(snapshot([]));
+}, timeout);
+const watcher = new MutationObserver(() => {
+    const button = document.querySelector(selectors.claim_button);
+    if (!button) return;
+    watcher.disconnect();
+    clearTimeout(timer);
+    claim(button);
+});
+watcher.observe(document, { childList: true, subtree: true });
+""")
+
+# The probe as a Runtime.evaluate expression for the asyncio engine, which
+# only needs the snapshot: its claims already arrive through the binding
+PAGE_SNAPSHOT_EXPRESSION = f"new Promise(resolve => (function() {{ {PAGE_PROBE_SCRIPT} }})(0, resolve))"
+
+class SharedBrowser:
+    """One Chrome instance hosting several channels, one tab per channel"""
+    def __init__(self, driver):
+        self.driver = driver
+        self.handles = {}
+        self.opened = set()
+        # WebDriver talks to one tab at a time, so every tab switch + command
+        # sequence has to happen under this lock
+        self.lock = threading.Lock()
+
+    def open_tab(self, channel):
+        with self.lock:
+            if self.handles:
+                self.driver.switch_to.new_window('tab')
+            self.handles[channel] = self.driver.current_window_handle
+
+    def close_tab(self, channel):
+        with self.lock:
+            handle = self.handles.pop(channel, None)
+            self.opened.discard(channel)
+            if handle is None:
+                return
+            self.driver.switch_to.window(handle)
+            if not self.handles:
+                # Keep the last window open so the browser stays alive
+                self.driver.get('about:blank')
+                return
+            self.driver.close()
+            self.driver.switch_to.window(next(iter(self.handles.values())))
+
+    @contextmanager
+    def tab(self, channel):
+        with self.lock:
+            self.driver.switch_to.window(self.handles[channel])
+            yield self.driver
+
+def encode_ws_frame(payload, opcode=0x1, mask=True):
+    """Encode a single, unfragmented websocket frame"""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack('!H', length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('!Q', length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = unmask_ws_payload(payload, key)
+    return bytes(header) + payload
+
+def unmask_ws_payload(payload, key):
+    if not payload:
+        return payload
+    length = len(payload)
+    full_key = (key * (length // 4 + 1))[:length]
+    masked = int.from_bytes(payload, 'big') ^ int.from_bytes(full_key, 'big')
+    return masked.to_bytes(length, 'big')
+
+async def read_ws_message(reader):
+    """Read one complete websocket message, returns (opcode, payload)"""
+    opcode, chunks = None, []
+    while True:
+        first, second = await reader.readexactly(2)
+        frame_opcode = first & 0x0f
+        length = second & 0x7f
+        if length == 126:
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await reader.readexactly(8))[0]
+        key = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if key:
+            payload = unmask_ws_payload(payload, key)
+        
+        # Control frames (close/ping/pong) are never fragmented
+        if frame_opcode >= 0x8:
+            return frame_opcode, payload
+        if frame_opcode:
+            opcode = frame_opcode
+        chunks.append(payload)
+        if first & 0x80:
+            return opcode, b''.join(chunks)
+
+class CDPConnection:
+    """Asyncio client for one browser's DevTools websocket"""
     def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.next_id = 0
+        self.pending = {}
+        self.sessions = {}
+        self.read_task = None
+        
+    async def connect(self, ws_url):
+        url = urlparse(ws_url)
+        self.reader, self.writer = await asyncio.open_connection(url.hostname, url.port)
+        
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            f'GET {url.path} HTTP/1.1\r\n'
+            f'Host: {url.hostname}:{url.port}\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {key}\r\n'
+            'Sec-WebSocket-Version: 13\r\n\r\n'
+        ).encode())
+        response = await self.reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in response.split(b'\r\n', 1)[0]:
+            raise ConnectionError(f"DevTools handshake failed: {response[:100]!r}")
+        
+        self.read_task = asyncio.ensure_future(self.read_loop())
+        
+    async def read_loop(self):
+        try:
+            while True:
+                opcode, payload = await read_ws_message(self.reader)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    self.writer.write(encode_ws_frame(payload, opcode=0xa))
+                    continue
+                if opcode != 0x1:
+                    continue
+                
+                message = json.loads(payload)
+                if 'id' in message:
+                    future = self.pending.pop(message['id'], None)
+                    if future and not future.done():
+                        if 'error' in message:
+                            future.set_exception(RuntimeError(message['error'].get('message')))
+                        else:
+                            future.set_result(message.get('result', {}))
+                elif message.get('method') == 'Target.detachedFromTarget':
+                    # The tab went away, end whoever reads its events
+                    queue = self.sessions.pop(message['params'].get('sessionId'), None)
+                    if queue is not None:
+                        queue.put_nowait(None)
+                else:
+                    queue = self.sessions.get(message.get('sessionId'))
+                    if queue is not None:
+                        queue.put_nowait(message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # Wake up everything still waiting on this browser
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("DevTools connection closed"))
+            self.pending.clear()
+            for queue in self.sessions.values():
+                queue.put_nowait(None)
+        
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        self.next_id += 1
+        message = {'id': self.next_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        self.writer.write(encode_ws_frame(json.dumps(message).encode()))
+        return await asyncio.wait_for(future, timeout)
+        
+    async def attach(self, url='about:blank'):
+        """Open a new tab and return (target id, session id, event queue)"""
+        target = await self.send('Target.createTarget', {'url': url})
+        session_id, events = await self.attach_target(target['targetId'])
+        return target['targetId'], session_id, events
+        
+    async def attach_target(self, target_id):
+        """Attach to an existing tab and return (session id, event queue)"""
+        attached = await self.send('Target.attachToTarget', {
+            'targetId': target_id,
+            'flatten': True
+        })
+        session_id = attached['sessionId']
+        self.sessions[session_id] = asyncio.Queue()
+        return session_id, self.sessions[session_id]
+        
+    @property
+    def closed(self):
+        return self.read_task is None or self.read_task.done()
+        
+    async def close(self):
+        if self.writer is None:
+            return
+        try:
+            self.writer.write(encode_ws_frame(b'', opcode=0x8))
+            self.writer.close()
+        except Exception:
+            pass
+        if self.read_task:
+            self.read_task.cancel()
+
+def devtools_url(driver):
+    """The browser-wide DevTools websocket of a chromedriver launched Chrome"""
+    address = driver.capabilities.get('goog:chromeOptions', {}).get('debuggerAddress')
+    with urllib.request.urlopen(f'http://{address}/json/version', timeout=10) as response:
+        return json.load(response)['webSocketDebuggerUrl']
+
+async def fail_request(connection, session_id, params):
+    """Answer a Fetch.requestPaused event by blocking the request"""
+    await connection.send('Fetch.failRequest', {
+        'requestId': params['requestId'],
+        'errorReason': 'BlockedByClient'
+    }, session_id)
+
+class ResourceTypeBlocker:
+    """Fails requests of the blocked resource types in WebDriver tabs.
+    Fetch interception pauses every matching request until it is answered,
+    and execute_cdp_cmd can't receive those events, so each browser gets a
+    DevTools socket of its own on one shared event loop"""
+    def __init__(self, resource_types):
+        self.patterns = fetch_patterns(resource_types)
+        self.loop = None
+        self.thread = None
+        self.connections = {}
+        self.lock = threading.Lock()
+        
+    def start(self):
+        with self.lock:
+            if self.thread:
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever)
+            self.thread.daemon = True
+            self.thread.start()
+        
+    def stop(self, timeout=5):
+        if not self.thread:
+            return
+        async def close():
+            for connection in self.connections.values():
+                await connection.close()
+        try:
+            asyncio.run_coroutine_threadsafe(close(), self.loop).result(timeout)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+            self.thread = None
+        
+    def block(self, driver, target_id, timeout=30):
+        """Start failing blocked types in one tab, call before it navigates"""
+        self.start()
+        asyncio.run_coroutine_threadsafe(self.intercept(driver, target_id), self.loop).result(timeout)
+        
+    async def intercept(self, driver, target_id):
+        # Forget browsers that were quit or recycled
+        self.connections = {used: connection for used, connection in self.connections.items() if not connection.closed}
+        connection = self.connections.get(driver)
+        if connection is None or connection.closed:
+            url = await asyncio.get_running_loop().run_in_executor(None, devtools_url, driver)
+            connection = CDPConnection()
+            await connection.connect(url)
+            self.connections[driver] = connection
+        session_id, events = await connection.attach_target(target_id)
+        await connection.send('Fetch.enable', {'patterns': self.patterns}, session_id)
+        asyncio.ensure_future(self.fail_paused(connection, session_id, events))
+        
+    async def fail_paused(self, connection, session_id, events):
+        # Ends when the tab or the browser goes away
+        while True:
+            event = await events.get()
+            if event is None:
+                return
+            if event.get('method') == 'Fetch.requestPaused':
+                try:
+                    await fail_request(connection, session_id, event['params'])
+                except Exception:
+                    # The request or its tab is already gone
+                    pass
+
+# The popup connects here, the port is built into the generated popup.js
+BRIDGE_PORT = 8765
+
+class StatusBridge:
+    """Loopback websocket that pushes channel events to the extension popup"""
+    WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+    
+    def __init__(self, host='127.0.0.1', port=BRIDGE_PORT):
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.clients = set()
+        # Latest state per channel, sent to every newly connected popup
+        self.channels = {}
+        self.lock = threading.Lock()
+        
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self.handle, self.host, self.port))
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        
+    def stop(self):
+        if not self.thread:
+            return
+        def close():
+            self.server.close()
+            for writer in self.clients:
+                writer.close()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(close)
+        self.thread.join(5)
+        self.thread = None
+        
+    def publish(self, event):
+        channel = event['channel']
+        with self.lock:
+            state = self.channels.setdefault(channel, {'points': 0, 'claims': 0, 'status': None})
+            if 'points' in event:
+                state['points'] = event['points']
+            if 'status' in event:
+                state['status'] = event['status']
+            if event['type'] == 'claim':
+                state['claims'] += 1
+        if self.thread:
+            self.loop.call_soon_threadsafe(self.broadcast, json.dumps(event).encode())
+            
+    def broadcast(self, payload):
+        frame = encode_ws_frame(payload, mask=False)
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+            else:
+                writer.write(frame)
+                
+    async def handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            headers = {}
+            for line in request.decode('latin-1').split('\r\n')[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            
+            # Only the extension may listen in, not arbitrary web pages
+            key = headers.get('sec-websocket-key')
+            if not key or not headers.get('origin', '').startswith('chrome-extension://'):
+                writer.write(b'HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n')
+                return
+            
+            accept = base64.b64encode(hashlib.sha1((key + self.WS_GUID).encode()).digest()).decode()
+            writer.write((
+                'HTTP/1.1 101 Switching Protocols\r\n'
+                'Upgrade: websocket\r\n'
+                'Connection: Upgrade\r\n'
+                f'Sec-WebSocket-Accept: {accept}\r\n\r\n'
+            ).encode())
+            with self.lock:
+                snapshot = json.dumps({'type': 'snapshot', 'channels': self.channels})
+            writer.write(encode_ws_frame(snapshot.encode(), mask=False))
+            self.clients.add(writer)
+            
+            while True:
+                opcode, payload = await read_ws_message(reader)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    writer.write(encode_ws_frame(payload, opcode=0xa, mask=False))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+class AsyncChannelEngine:
+    """Runs every channel as a coroutine on one event loop over raw CDP"""
+    def __init__(self, manager):
+        self.manager = manager
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+        self.browsers = []
+        self.channel_browser = {}
+        self.sessions = {}
+        self.tasks = {}
+        self.network = {}
+        # Browsers being launched; the condition is created on the loop
+        self.launching = 0
+        self.browsers_changed = None
+        
+    def start(self):
+        if self.thread:
+            return
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        
+    def add_channel(self, channel):
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self.add(channel), self.loop)
+        
+    def remove_channel(self, channel):
+        return asyncio.run_coroutine_threadsafe(self.remove(channel), self.loop)
+        
+    def stop(self, timeout=10):
+        if not self.loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        
+    async def shutdown(self):
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        for driver, connection in self.browsers:
+            await connection.close()
+        
+    def recycle_browser(self, driver):
+        asyncio.run_coroutine_threadsafe(self.recycle(driver), self.loop).result(120)
+        
+    async def recycle(self, driver):
+        browser = next((b for b in self.browsers if b[0] is driver), None)
+        if browser is None:
+            return
+        channels = [channel for channel, used in self.channel_browser.items() if used is browser]
+        self.browsers.remove(browser)
+        for channel in channels:
+            await self.remove(channel)
+        await browser[1].close()
+        await asyncio.get_running_loop().run_in_executor(None, driver.quit)
+        
+        # Re-added channels land on a freshly launched browser
+        results = await asyncio.gather(*(self.add(channel) for channel in channels), return_exceptions=True)
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                print(f"Could not reopen {channel}: {result}")
+                self.manager.record_error(channel, result)
+                self.manager.set_status(channel, 'error')
+        
+    async def add(self, channel):
+        """Start watching a channel, returns once its page is open"""
+        if channel in self.tasks:
+            return
+        ready = asyncio.get_running_loop().create_future()
+        self.tasks[channel] = asyncio.ensure_future(self.watch_channel(channel, ready))
+        await ready
+        
+    async def remove(self, channel):
+        task = self.tasks.pop(channel, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        
+    async def connect_browser(self):
+        # Browsers are still launched through undetected_chromedriver, only
+        # the per-channel traffic goes over the DevTools socket
+        loop = asyncio.get_running_loop()
+        driver = await loop.run_in_executor(None, self.manager.acquire_browser)
+        url = await loop.run_in_executor(None, devtools_url, driver)
+        
+        connection = CDPConnection()
+        await connection.connect(url)
+        return driver, connection
+        
+    async def pick_browser(self):
+        if self.browsers_changed is None:
+            self.browsers_changed = asyncio.Condition()
+        limit = max(1, self.manager.shared_browsers)
+        
+        # Launch browsers lazily, then fill the least loaded one. Only the
+        # slot is reserved under the lock, so browsers start in parallel.
+        async with self.browsers_changed:
+            # Wait for launches in flight so the new browsers get their share
+            while self.launching and len(self.browsers) + self.launching >= limit:
+                await self.browsers_changed.wait()
+            launch = len(self.browsers) + self.launching < limit
+            if launch:
+                self.launching += 1
+            else:
+                return min(self.browsers, key=lambda browser: sum(
+                    1 for used in self.channel_browser.values() if used is browser))
+        
+        browser = None
+        try:
+            browser = await self.connect_browser()
+            return browser
+        finally:
+            async with self.browsers_changed:
+                self.launching -= 1
+                if browser is not None:
+                    self.browsers.append(browser)
+                self.browsers_changed.notify_all()
+        
+    def playback_sample(self, channel):
+        return asyncio.run_coroutine_threadsafe(self.sample(channel), self.loop).result(30)
+        
+    def network_sample(self, channel):
+        return Counter(self.network[channel])
+        
+    async def sample(self, channel):
+        connection, session_id = self.sessions[channel]
+        stats = await self.evaluate(connection, session_id, f'(() => {{ {PLAYBACK_STATS_SCRIPT} }})()')
+        metrics = (await connection.send('Performance.getMetrics', session_id=session_id))['metrics']
+        return stats, next((m['value'] for m in metrics if m['name'] == 'TaskDuration'), 0)
+        
+    async def evaluate(self, connection, session_id, expression, await_promise=False):
+        result = await connection.send('Runtime.evaluate', {
+            'expression': expression,
+            'returnByValue': True,
+            'awaitPromise': await_promise
+        }, session_id)
+        return result.get('result', {}).get('value')
+        
+    async def supervise(self, channel, connection, session_id):
+        """Snapshot the page for its watchdog and recover it when one is due"""
+        page = await self.evaluate(connection, session_id, PAGE_SNAPSHOT_EXPRESSION, await_promise=True)
+        if page is None:
+            return
+        self.manager.page_states[channel] = page
+        action = self.manager.watchdog_action(channel, page)
+        if action == 'navigate':
+            await connection.send('Page.navigate', {'url': f'{self.manager.base_url}/{channel}'}, session_id)
+        elif action == 'reload':
+            # VOLUME_SCRIPT is applied again on the load event
+            await connection.send('Page.reload', session_id=session_id)
+        
+    async def watch_channel(self, channel, ready=None):
+        target_id = None
+        try:
+            browser = await self.pick_browser()
+            driver, connection = browser
+            self.channel_browser[channel] = browser
+            self.manager.drivers[channel] = driver
+            
+            target_id, session_id, events = await connection.attach()
+            self.sessions[channel] = (connection, session_id)
+            await connection.send('Page.enable', session_id=session_id)
+            await connection.send('Runtime.enable', session_id=session_id)
+            await connection.send('Performance.enable', session_id=session_id)
+            if self.manager.low_resource:
+                await connection.send('Page.addScriptToEvaluateOnNewDocument', {
+                    'source': LOW_RESOURCE_SCRIPT
+                }, session_id)
+            if self.manager.block_resources or self.manager.count_network:
+                await connection.send('Network.enable', session_id=session_id)
+            if self.manager.block_resources:
+                await connection.send('Network.setBlockedURLs', {'urls': self.manager.blocked_urls}, session_id)
+                if self.manager.blocked_resource_types:
+                    await connection.send('Fetch.enable', {
+                        'patterns': fetch_patterns(self.manager.blocked_resource_types)
+                    }, session_id)
+                await connection.send('Page.addScriptToEvaluateOnNewDocument', {
+                    'source': HIDE_CHAT_SCRIPT
+                }, session_id)
+            if self.manager.count_network:
+                self.network[channel] = Counter()
+            await connection.send('Runtime.addBinding', {'name': 'twitchAfkBinding'}, session_id)
+            await connection.send('Page.addScriptToEvaluateOnNewDocument', {
+                'source': CLAIM_OBSERVER_SCRIPT
+            }, session_id)
+            navigated = time.monotonic()
+            await connection.send('Page.navigate', {'url': f'{self.manager.base_url}/{channel}'}, session_id)
+            self.manager.channel_ready(channel)
+            if ready is not None:
+                ready.set_result(None)
+            
+            next_check = time.monotonic() + self.manager.watchdog_interval
+            while self.manager.running:
+                if self.manager.watchdog and time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.manager.watchdog_interval
+                    try:
+                        await self.supervise(channel, connection, session_id)
+                    except Exception as e:
+                        self.manager.record_error(channel, e)
+                try:
+                    event = await asyncio.wait_for(events.get(), max(0, min(60, next_check - time.monotonic())))
+                except asyncio.TimeoutError:
+                    continue
+                if event is None:
+                    print(f"Lost DevTools connection for {channel}")
+                    break
+                
+                method = event.get('method')
+                params = event.get('params', {})
+                if method == 'Page.loadEventFired':
+                    if navigated is not None:
+                        self.manager.metrics.observe('twitchafk_page_load_seconds',
+                            time.monotonic() - navigated, channel=channel)
+                        navigated = None
+                    await self.evaluate(connection, session_id, VOLUME_SCRIPT)
+                elif method == 'Runtime.bindingCalled' and params.get('name') == 'twitchAfkBinding':
+                    claim = json.loads(params['payload'])
+                    if claim.get('type') == 'claim':
+                        self.manager.record_claim_event(channel, claim)
+                elif method == 'Fetch.requestPaused':
+                    # Only the blocked resource types are intercepted
+                    await fail_request(connection, session_id, params)
+                elif channel in self.network:
+                    count_network_event(self.network[channel], method, params)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if ready is not None and not ready.done():
+                # Still starting, launch_channel records it and retries
+                ready.set_exception(e)
+                return
+            print(f"Error in {channel} coroutine: {e}")
+            self.manager.record_error(channel, e)
+            self.manager.set_status(channel, 'error')
+        finally:
+            if ready is not None and not ready.done():
+                ready.cancel()
+            if self.tasks.get(channel) is asyncio.current_task():
+                del self.tasks[channel]
+            self.channel_browser.pop(channel, None)
+            self.sessions.pop(channel, None)
+            self.network.pop(channel, None)
+            self.manager.drivers.pop(channel, None)
+            if target_id and self.manager.running:
+                try:
+                    await connection.send('Target.closeTarget', {'targetId': target_id})
+                except Exception:
+                    pass
+
+TWITCH_GQL_URL = 'https://gql.twitch.tv/gql'
+TWITCH_CLIENT_ID = 'kimne78kx3ncx6brgo4mv6wki5h1ko'
+STREAM_QUERY = 'query($login: String!) { user(login: $login) { stream { id } } }'
+
+class LivenessChecker:
+    """Cached, batched "is this channel live" lookups over Twitch's GQL API"""
+    def __init__(self, gql_url=TWITCH_GQL_URL, client_id=TWITCH_CLIENT_ID,
+                 ttl=60, timeout=10, batch_size=35):
+        self.gql_url = gql_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.cache = {}
+        self.lock = threading.Lock()
+        
+        # One pooled keep-alive session for every lookup
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Client-ID'] = client_id
+        
+    def is_live(self, channel):
+        return channel in self.live_channels([channel])
+        
+    def live_channels(self, channels):
+        now = time.monotonic()
+        with self.lock:
+            stale = [channel for channel in channels
+                     if now - self.cache.get(channel, (None, -self.ttl))[1] >= self.ttl]
+        
+        for i in range(0, len(stale), self.batch_size):
+            self.fetch(stale[i:i + self.batch_size])
+        
+        with self.lock:
+            return {channel for channel in channels if self.cache.get(channel, (False,))[0]}
+        
+    def fetch(self, channels):
+        # GQL accepts an array of operations, so a whole batch is one request
+        queries = [{'query': STREAM_QUERY, 'variables': {'login': channel}} for channel in channels]
+        response = self.session.post(self.gql_url, json=queries, timeout=self.timeout)
+        response.raise_for_status()
+        
+        now = time.monotonic()
+        with self.lock:
+            for channel, result in zip(channels, response.json()):
+                user = (result.get('data') or {}).get('user')
+                self.cache[channel] = (bool(user and user.get('stream')), now)
+
+class SessionStore:
+    """Authenticated Twitch cookies persisted between runs"""
+    def __init__(self, path='twitch_session.json', validate_url='https://id.twitch.tv/oauth2/validate'):
+        self.path = path
+        self.validate_url = validate_url
+        
+    def save(self, cookies):
+        # The file holds a login token, keep it private to the user
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'saved_at': time.time(), 'cookies': cookies}, f, indent=2)
+            
+    def load(self):
+        """Return the stored cookies, or None when missing or stale"""
+        try:
+            with open(self.path) as f:
+                cookies = json.load(f)['cookies']
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        token = next((c for c in cookies if c.get('name') == 'auth-token'), None)
+        if token is None:
+            return None
+        if token.get('expiry') and token['expiry'] <= time.time():
+            return None
+        if not self.token_valid(token['value']):
+            return None
+        return cookies
+        
+    def token_valid(self, token):
+        import requests
+        try:
+            response = requests.get(self.validate_url, timeout=10,
+                headers={'Authorization': f'OAuth {token}'})
+        except requests.RequestException:
+            # Can't tell while offline, trust the expiry check
+            return True
+        return response.status_code != 401
+
+def cdp_cookies(cookies):
+    """Convert Selenium cookie dicts to CDP Network.CookieParam"""
+    params = []
+    for cookie in cookies:
+        param = {
+            'name': cookie['name'],
+            'value': cookie['value'],
+            'domain': cookie.get('domain', '.twitch.tv'),
+            'path': cookie.get('path', '/'),
+            'secure': cookie.get('secure', False),
+            'httpOnly': cookie.get('httpOnly', False)
+        }
+        if cookie.get('expiry'):
+            param['expires'] = cookie['expiry']
+        if cookie.get('sameSite'):
+            param['sameSite'] = cookie['sameSite']
+        params.append(param)
+    return params
+
+class PointsLedger:
+    """Local SQLite record of every balance read and claim, written in batches"""
+    def __init__(self, path='twitch_points.db', flush_interval=5, batch_size=200):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                channel TEXT NOT NULL,
+                ts REAL NOT NULL,
+                kind TEXT NOT NULL,
+                balance INTEGER NOT NULL,
+                delta INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_channel_ts ON events (channel, ts);
+            CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+            
+            -- Running per-channel totals so they never need a history scan
+            CREATE TABLE IF NOT EXISTS totals (
+                channel TEXT PRIMARY KEY,
+                balance INTEGER NOT NULL,
+                earned INTEGER NOT NULL,
+                claims INTEGER NOT NULL,
+                updated REAL NOT NULL
+            );
+        """)
+        self.balances = dict(self.db.execute('SELECT channel, balance FROM totals'))
+        
+        self.closed = threading.Event()
+        self.flusher = threading.Thread(target=self.run_flusher)
+        self.flusher.daemon = True
+        self.flusher.start()
+        
+    def record(self, channel, balance, claimed=False):
+        with self.lock:
+            # Deltas are taken against the last seen balance, so spending
+            # points shows up as a negative delta instead of lost earnings
+            previous = self.balances.get(channel)
+            delta = 0 if previous is None else balance - previous
+            self.balances[channel] = balance
+            self.buffer.append((channel, time.time(), 'claim' if claimed else 'balance', balance, delta))
+            full = len(self.buffer) >= self.batch_size
+        if full:
+            self.flush()
+            
+    def flush(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return
+        
+        with self.db_lock, self.db:
+            self.db.executemany(
+                'INSERT INTO events (channel, ts, kind, balance, delta) VALUES (?, ?, ?, ?, ?)', rows)
+            self.db.executemany("""
+                INSERT INTO totals (channel, balance, earned, claims, updated)
+                VALUES (?, ?, max(?, 0), ? = 'claim', ?)
+                ON CONFLICT (channel) DO UPDATE SET
+                    balance = excluded.balance,
+                    earned = earned + excluded.earned,
+                    claims = claims + excluded.claims,
+                    updated = excluded.updated
+            """, [(channel, balance, delta, kind, ts) for channel, ts, kind, balance, delta in rows])
+            
+    def run_flusher(self):
+        while not self.closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Ledger flush failed: {e}")
+                
+    def close(self):
+        self.closed.set()
+        self.flush()
+        with self.db_lock:
+            self.db.close()
+            
+    def totals(self):
+        """Latest balance, points earned and claims made per channel"""
+        self.flush()
+        with self.db_lock:
+            rows = self.db.execute('SELECT channel, balance, earned, claims, updated FROM totals')
+            return {channel: {'balance': balance, 'earned': earned, 'claims': claims, 'updated': updated}
+                    for channel, balance, earned, claims, updated in rows}
+            
+    def points_per_hour(self, hours=1, channel=None, until=None):
+        """Points earned per hour over the window, per channel"""
+        self.flush()
+        until = until or time.time()
+        since = until - hours * 3600
+        query = 'SELECT channel, sum(max(delta, 0)) FROM events WHERE ts >= ? AND ts < ?'
+        params = [since, until]
+        if channel:
+            query += ' AND channel = ?'
+            params.append(channel)
+        with self.db_lock:
+            rows = self.db.execute(query + ' GROUP BY channel', params)
+            return {name: earned / hours for name, earned in rows}
+            
+    def history(self, channel, since=0, until=None):
+        self.flush()
+        with self.db_lock:
+            return self.db.execute(
+                'SELECT ts, kind, balance, delta FROM events WHERE channel = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                (channel, since, until or time.time() + 1)).fetchall()
+
+class BrowserPool:
+    """Keeps already launched, already authenticated browsers on standby"""
+    def __init__(self, launch, size=2):
+        self.launch = launch
+        self.size = size
+        self.idle = []
+        self.launching = 0
+        self.hits = 0
+        self.misses = 0
+        self.running = False
+        self.condition = threading.Condition()
+        
+    def start(self):
+        self.running = True
+        thread = threading.Thread(target=self.replenish)
+        thread.daemon = True
+        thread.start()
+        
+    def drain(self):
+        """Stop replenishing and hand back the idle browsers"""
+        with self.condition:
+            self.running = False
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+        return idle
+        
+    def stop(self):
+        for driver in self.drain():
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        
+    def acquire(self):
+        with self.condition:
+            if self.idle:
+                self.hits += 1
+                driver = self.idle.pop()
+            else:
+                self.misses += 1
+                driver = None
+            self.condition.notify_all()
+        # Pool ran dry, fall back to a cold launch
+        return driver or self.launch()
+        
+    def replenish(self):
+        while True:
+            with self.condition:
+                while self.running and len(self.idle) + self.launching >= self.size:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                self.launching += 1
+            
+            driver = None
+            try:
+                driver = self.launch()
+            except Exception as e:
+                print(f"Warm browser launch failed: {e}")
+                time.sleep(10)
+            
+            with self.condition:
+                self.launching -= 1
+                if driver and self.running:
+                    self.idle.append(driver)
+                    driver = None
+            if driver:
+                driver.quit()
+                
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        print(f"Browser pool: {len(self.idle)} idle, {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)")
+
+class Metrics:
+    """Labelled counters, gauges and histograms rendered as Prometheus text"""
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    
+    HELP = {
+        'twitchafk_page_load_seconds': ('histogram', 'Time to load a channel page'),
+        'twitchafk_claim_latency_seconds': ('histogram', 'Time from a bonus appearing in the page to the claim being recorded'),
+        'twitchafk_claims_total': ('counter', 'Bonuses claimed'),
+        'twitchafk_balance_reads_total': ('counter', 'Channel point balances read'),
+        'twitchafk_probes_total': ('counter', 'Checks made for a claimable bonus'),
+        'twitchafk_balance': ('gauge', 'Last seen channel point balance'),
+        'twitchafk_exceptions_total': ('counter', 'Exceptions raised while managing a channel'),
+        'twitchafk_recycles_total': ('counter', 'Browsers restarted for exceeding resource limits'),
+        'twitchafk_recoveries_total': ('counter', 'Pages reloaded or re-navigated by the watchdog'),
+        'twitchafk_lost_seconds_total': ('counter', 'Watch time lost to a stalled, offline or redirected page'),
+        'twitchafk_driver_rss_bytes': ('gauge', 'Resident memory of a browser process tree'),
+        'twitchafk_driver_cpu_seconds_total': ('counter', 'CPU time used by a browser process tree')
+    }
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.histograms = {}
+        # Called before every render/snapshot to refresh sampled values
+        self.collectors = []
+        
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+            
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.values[(name, tuple(sorted(labels.items())))] = value
+            
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            # Per-bucket counts followed by the sum and the count
+            histogram = self.histograms.setdefault(key, [0] * (len(self.BUCKETS) + 2))
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+            
+    def collect(self):
+        for collector in self.collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                
+    @staticmethod
+    def format_labels(labels):
+        if not labels:
+            return ''
+        pairs = []
+        for name, value in labels:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{name}="{value}"')
+        return '{' + ','.join(pairs) + '}'
+        
+    def render(self):
+        self.collect()
+        lines = []
+        with self.lock:
+            for name, (kind, help_text) in self.HELP.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                if kind == 'histogram':
+                    for (metric, labels), histogram in sorted(self.histograms.items()):
+                        if metric != name:
+                            continue
+                        for bound, count in zip(self.BUCKETS, histogram):
+                            lines.append(f'{name}_bucket{self.format_labels(labels + (("le", bound),))} {count}')
+                        lines.append(f'{name}_bucket{self.format_labels(labels + (("le", "+Inf"),))} {histogram[-1]}')
+                        lines.append(f'{name}_sum{self.format_labels(labels)} {histogram[-2]}')
+                        lines.append(f'{name}_count{self.format_labels(labels)} {histogram[-1]}')
+                else:
+                    for (metric, labels), value in sorted(self.values.items()):
+                        if metric == name:
+                            lines.append(f'{name}{self.format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+        
+    def snapshot(self):
+        self.collect()
+        with self.lock:
+            values = [{'name': name, 'labels': dict(labels), 'value': value}
+                      for (name, labels), value in self.values.items()]
+            values += [{'name': name, 'labels': dict(labels), 'count': h[-1], 'sum': h[-2]}
+                       for (name, labels), h in self.histograms.items()]
+        return values
+
+class MetricsServer:
+    """Serves Metrics.render() on http://host:port/metrics"""
+    def __init__(self, metrics, host='127.0.0.1', port=9108):
+        metrics_source = metrics
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics_source.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class ClaimSchedule:
+    """Learns a channel's bonus cadence and decides when to probe for it"""
+    def __init__(self, default_interval=900, margin=30, dense=2, idle=30, history=6):
+        self.default_interval = default_interval
+        self.margin = margin
+        self.dense = dense
+        self.idle = idle
+        self.claims = deque(maxlen=history)
+        self.last_probe = 0
+        self.probes = 0
+        self.claim_count = 0
+        
+    def record_probe(self, at=None):
+        self.last_probe = time.time() if at is None else at
+        self.probes += 1
+        
+    def record_claim(self, at=None):
+        self.claims.append(time.time() if at is None else at)
+        self.claim_count += 1
+        
+    @property
+    def interval(self):
+        claims = list(self.claims)
+        gaps = [later - earlier for earlier, later in zip(claims, claims[1:])]
+        # Median so a missed bonus (a double-length gap) doesn't skew it
+        return statistics.median(gaps) if gaps else None
+        
+    def expected_at(self):
+        if not self.claims:
+            return None
+        return self.claims[-1] + (self.interval or self.default_interval)
+        
+    def next_probe_at(self):
+        expected = self.expected_at()
+        if expected is None:
+            # Nothing learned yet, probe at the base cadence
+            return self.last_probe + self.idle
+        if self.last_probe < expected - self.margin:
+            return expected - self.margin
+        if self.last_probe < expected + self.margin:
+            return self.last_probe + self.dense
+        # Overdue, the cadence changed or the stream paused
+        return self.last_probe + self.idle
+
+class PageWatchdog:
+    """Notices when a channel's page stops earning (stalled player, stream
+    offline, raided away to another channel) and paces the recovery attempts"""
+    # How each state is fixed, and how long it may last before the first try
+    RECOVERY = {
+        'stalled': ('reload', 30),
+        'redirected': ('navigate', 0),
+        'offline': ('reload', 300)
+    }
+    
+    def __init__(self, channel, max_delay=1800):
+        # Compared with the page's URL path, which is lowercased
+        self.channel = channel.lower()
+        self.max_delay = max_delay
+        self.lost = dict.fromkeys(self.RECOVERY, 0.0)
+        self.restart()
+        
+    def restart(self):
+        """Forget the current state, e.g. after the page was opened again"""
+        self.state = 'ok'
+        self.since = None
+        self.last_update = None
+        self.attempts = 0
+        self.next_attempt = None
+        
+    def classify(self, page):
+        url = page.get('url')
+        if url and urlparse(url).path.strip('/').split('/')[0].lower() != self.channel:
+            return 'redirected'
+        if page.get('offline'):
+            return 'offline'
+        # Snapshots without a player (HTTP watchers) can't stall
+        if page.get('stalled') or (page.get('live') and not page.get('playing', True)):
+            return 'stalled'
+        return 'ok'
+        
+    def update(self, page, at=None):
+        """Take a probe's page snapshot, returns 'reload'/'navigate' when one is due"""
+        now = time.time() if at is None else at
+        # Everything since the last snapshot is charged to the state it was in
+        if self.state != 'ok' and self.last_update is not None:
+            self.lost[self.state] += now - self.last_update
+        self.last_update = now
+        
+        state = self.classify(page)
+        if state != self.state:
+            self.state = state
+            self.since = now
+            self.attempts = 0
+            self.next_attempt = None if state == 'ok' else now + self.RECOVERY[state][1]
+        if state == 'ok' or now < self.next_attempt:
+            return None
+        
+        action, delay = self.RECOVERY[state]
+        self.attempts += 1
+        # Wait twice as long after every attempt that didn't help
+        self.next_attempt = now + min(self.max_delay, max(delay, 15) * 2 ** self.attempts)
+        return action
+
+class ResourceGovernor:
+    """Samples every browser process tree and recycles the ones over limits"""
+    def __init__(self, manager, max_rss_mb=None, max_cpu_percent=None, interval=60, strikes=3):
+        self.manager = manager
+        # Limits are per channel, a shared browser gets N channels' worth
+        self.max_rss_mb = max_rss_mb
+        self.max_cpu_percent = max_cpu_percent
+        self.interval = interval
+        self.strikes = strikes
+        self.samples = {}
+        self.events = []
+        
+    def run(self):
+        while self.manager.running:
+            self.manager.sleep_until(time.time() + self.interval)
+            if not self.manager.running:
+                return
+            owners = self.manager.driver_owners()
+            self.samples = {driver: sample for driver, sample in self.samples.items() if driver in owners}
+            for driver, channels in owners.items():
+                try:
+                    reason = self.check(driver, len(channels))
+                    if reason:
+                        self.recycle(driver, channels, reason)
+                except Exception as e:
+                    print(f"Resource check for {', '.join(channels)} failed: {e}")
+                    
+    def check(self, driver, channel_count):
+        """Return why the driver needs recycling, or None"""
+        processes = driver_processes(driver)
+        # Children come and go, one that exits mid-sample mustn't fail the check
+        rss_mb = driver_rss(driver, processes) / 2**20
+        cpu_seconds = process_cpu_seconds(processes)
+        now = time.monotonic()
+        
+        previous = self.samples.get(driver)
+        cpu_percent = None
+        strikes = 0
+        if previous:
+            elapsed = now - previous['time']
+            cpu_percent = (cpu_seconds - previous['cpu']) / elapsed * 100 if elapsed > 0 else 0
+            strikes = previous['strikes']
+        
+        # CPU has to stay high for several samples, a single spike is normal
+        if self.max_cpu_percent and cpu_percent is not None and cpu_percent > self.max_cpu_percent * channel_count:
+            strikes += 1
+        else:
+            strikes = 0
+        self.samples[driver] = {'time': now, 'cpu': cpu_seconds, 'strikes': strikes,
+                                'rss_mb': rss_mb, 'cpu_percent': cpu_percent}
+        
+        if self.max_rss_mb and rss_mb > self.max_rss_mb * channel_count:
+            return f"rss {rss_mb:.0f} MB"
+        if strikes >= self.strikes:
+            return f"cpu {cpu_percent:.0f}%"
+        return None
+        
+    def recycle(self, driver, channels, reason):
+        sample = self.samples.pop(driver, {})
+        print(f"Recycling browser for {', '.join(channels)}: {reason}")
+        self.events.append({
+            'time': time.time(),
+            'channels': list(channels),
+            'reason': reason,
+            'rss_mb': sample.get('rss_mb'),
+            'cpu_percent': sample.get('cpu_percent')
+        })
+        self.manager.metrics.inc('twitchafk_recycles_total', reason=reason.split()[0])
+        self.manager.recycle_driver(driver)
+
+CHANNEL_POINTS_QUERY = ('query($login: String!) { currentUser { id } user(login: $login) { id stream { id } '
+                        'channel { self { communityPoints { balance availableClaim { id } } } } } }')
+CLAIM_POINTS_MUTATION = ('mutation($input: ClaimCommunityPointsInput!) { claimCommunityPoints(input: $input) '
+                         '{ currentPoints error { code } } }')
+
+# Where watch presence ("minute-watched") events go, published in the page's settings
+SPADE_URL = re.compile(r'"spade_?[uU]rl":"(.*?)"')
+SETTINGS_URL = re.compile(r'https://(?:static\.twitchcdn\.net|assets\.twitch\.tv)/config/settings\.[0-9a-f]+\.js')
+
+class BrowserTransport:
+    """Watches a channel through its page in Chrome"""
+    # check() returns right away unless it waits in the page for a claim
+    paced = False
+    
+    def __init__(self, manager, channel):
+        self.manager = manager
+        self.channel = channel
+        # The thread belongs to this driver, a recycled channel gets a new one
+        self.driver = manager.drivers.get(channel)
+        
+    def alive(self):
+        return self.manager.drivers.get(self.channel) is self.driver
+        
+    def open(self):
+        with self.manager.channel_driver(self.channel) as driver:
+            self.manager.open_channel(driver, self.channel)
+            
+    def check(self, timeout=0):
+        with self.manager.channel_driver(self.channel) as driver:
+            return self.manager.check_channel(driver, self.channel, timeout=timeout)
+
+class HttpTransport:
+    """Watches a channel without rendering it: presence events, balance and
+    claims go straight to Twitch over the manager's pooled HTTP session"""
+    # check() blocks until the next minute-watched event is due
+    paced = True
+    
+    def __init__(self, manager, channel, interval=60):
+        self.manager = manager
+        self.channel = channel
+        self.interval = interval
+        self.spade_url = None
+        self.requests = 0
+        
+    def alive(self):
+        return self.manager.http_transports.get(self.channel) is self
+        
+    def request(self, method, url, **kwargs):
+        self.requests += 1
+        response = self.manager.http_session().request(method, url, timeout=10, **kwargs)
+        response.raise_for_status()
+        return response
+        
+    def gql(self, query, variables):
+        result = self.request('POST', self.manager.gql_url, json={'query': query, 'variables': variables}).json()
+        if result.get('errors'):
+            raise RuntimeError(f"GQL error: {result['errors'][0].get('message')}")
+        return result['data']
+        
+    def open(self):
+        if self.spade_url:
+            # Already opened by add_channel
+            return
+        # One plain page fetch to find the presence endpoint, nothing is rendered
+        page = self.request('GET', f'{self.manager.base_url}/{self.channel}').text
+        match = SPADE_URL.search(page)
+        if match is None:
+            settings = SETTINGS_URL.search(page)
+            if settings is not None:
+                match = SPADE_URL.search(self.request('GET', settings.group(0)).text)
+        if match is None:
+            raise RuntimeError(f"No presence endpoint on the {self.channel} page")
+        self.spade_url = match.group(1).replace('\\/', '/')
+        
+    def check(self, timeout=0):
+        """Report a watched minute, claim any bonus and read the balance"""
+        started = time.time()
+        self.manager.metrics.inc('twitchafk_probes_total', channel=self.channel)
+        data = self.gql(CHANNEL_POINTS_QUERY, {'login': self.channel})
+        user = data.get('user')
+        if not user:
+            raise RuntimeError(f"Unknown channel {self.channel}")
+        if user.get('stream'):
+            self.send_presence(data['currentUser']['id'], user)
+        
+        points = ((user.get('channel') or {}).get('self') or {}).get('communityPoints') or {}
+        balance = points.get('balance')
+        claimed = False
+        if points.get('availableClaim'):
+            result = self.gql(CLAIM_POINTS_MUTATION, {'input': {
+                'channelID': user['id'],
+                'claimID': points['availableClaim']['id']
+            }})['claimCommunityPoints'] or {}
+            claimed = not result.get('error')
+            balance = result.get('currentPoints', balance)
+        
+        if balance is not None and (claimed or balance != self.manager.ledger.balances.get(self.channel)):
+            self.manager.record_points(self.channel, balance, claimed=claimed)
+        elif claimed:
+            self.manager.metrics.inc('twitchafk_claims_total', channel=self.channel)
+        self.manager.page_states[self.channel] = {
+            'claims': [{'type': 'claim', 'balance': balance}] if claimed else [],
+            'balance': balance,
+            'live': bool(user.get('stream')),
+            'offline': not user.get('stream'),
+            # Presence is sent whenever the stream is up
+            'playing': bool(user.get('stream')),
+            'url': None
+        }
+        self.manager.supervise_page(None, self.channel, self.manager.page_states[self.channel])
+        
+        self.manager.sleep_until(started + self.interval, self.channel)
+        return claimed
+        
+    def send_presence(self, user_id, user):
+        event = [{'event': 'minute-watched', 'properties': {
+            'channel_id': user['id'],
+            'broadcast_id': user['stream']['id'],
+            'player': 'site',
+            'user_id': user_id,
+            'live': True,
+            'channel': self.channel
+        }}]
+        payload = base64.b64encode(json.dumps(event, separators=(',', ':')).encode()).decode()
+        self.request('POST', self.spade_url, data={'data': payload})
+
+class TwitchPointsManager:
+    def __init__(self, shared_browsers=0, event_driven=True, engine='threads',
+                 live_only=False, liveness=None, low_resource=False, session_store=None,
+                 ledger=None, bridge_port=BRIDGE_PORT, warm_browsers=0, base_url='https://twitch.tv',
+                 metrics_port=None, metrics_log=None, metrics_interval=60, startup_concurrency=4,
+                 predictive=True, max_rss_mb=None, max_cpu_percent=None, transport='browser',
+                 transports=None, gql_url=TWITCH_GQL_URL, block_resources=True,
+                 blocked_urls=None, blocked_resource_types=None, count_network=False,
+                 watchdog=True, watchdog_interval=60):
+        self.base_url = base_url
+        self.channels = []
         self.drivers = {}
         self.running = True
         self.auth_driver = None
         self.authenticated = False
+        self.cookies = []
+        self.session_store = session_store or SessionStore()
+        self.ledger = ledger or PointsLedger()
+        
+        # Live updates for the extension popup, None to disable
+        self.bridge = StatusBridge(port=bridge_port) if bridge_port else None
+        
+        # Pre-launched spare browsers so adding a channel skips the cold start
+        self.pool = BrowserPool(self.launch_browser, warm_browsers) if warm_browsers else None
+        self.added_at = {}
+        self.first_check_delays = {}
+        
+        # Channels are launched through a bounded worker pool
+        self.startup_concurrency = startup_concurrency
+        self.launch_lock = threading.Lock()
+        self.browsers_changed = threading.Condition(self.launch_lock)
+        self.launching = 0
+        # Channels some worker is adding right now, also under launch_lock
+        self.starting = set()
+        self.launch_times = {}
+        self.launch_failures = {}
+        self.startup_seconds = None
+        
+        # Per-channel learned bonus cadence, probes are concentrated around
+        # the expected appearance instead of running all the time
+        self.predictive = predictive
+        self.schedules = {}
+        
+        # Restart browsers that leak past these per-channel limits
+        self.governor = None
+        if max_rss_mb or max_cpu_percent:
+            self.governor = ResourceGovernor(self, max_rss_mb=max_rss_mb, max_cpu_percent=max_cpu_percent)
+        
+        # Instrumentation, optionally served for Prometheus and/or appended
+        # to a JSON lines file every metrics_interval seconds
+        self.metrics = Metrics()
+        self.metrics.collectors.append(self.collect_driver_metrics)
+        self.metrics_server = MetricsServer(self.metrics, port=metrics_port) if metrics_port else None
+        self.metrics_log = metrics_log
+        self.metrics_interval = metrics_interval
+        
+        # 0 = one Chrome per channel, N = multiplex all channels as tabs
+        # across N shared Chrome instances
+        self.shared_browsers = shared_browsers
+        self.browsers = []
+        self.channel_browser = {}
+        self.threads = []
+        
+        # Let the injected observer claim bonuses instead of polling for them
+        self.event_driven = event_driven
+        
+        # 'threads' drives channels through Selenium, 'asyncio' runs them
+        # all as coroutines over raw CDP (always tab based)
+        self.engine = AsyncChannelEngine(self) if engine == 'asyncio' else None
+        
+        # Only keep browsers open for channels that are currently live
+        self.liveness = liveness or (LivenessChecker() if live_only else None)
+        
+        # Lowest rendition, tiny viewport, no animations
+        self.low_resource = low_resource
+        self.playback_samples = {}
+        self.page_states = {}
+        
+        # 'browser' renders channels in Chrome, 'http' watches them with
+        # plain requests and no browser at all. `transports` overrides the
+        # default per channel, e.g. {'somechannel': 'http'}
+        self.transport = transport
+        self.channel_transports = transports or {}
+        self.gql_url = gql_url
+        self.http_transports = {}
+        self.http = None
+        
+        # Keep chat, images, fonts and ads out of watcher pages
+        self.block_resources = block_resources
+        self.blocked_urls = list(BLOCKED_URLS if blocked_urls is None else blocked_urls)
+        self.blocked_resource_types = list(
+            BLOCKED_RESOURCE_TYPES if blocked_resource_types is None else blocked_resource_types)
+        self.resource_blocker = None
+        if block_resources and self.blocked_resource_types and not self.engine:
+            self.resource_blocker = ResourceTypeBlocker(self.blocked_resource_types)
+        self.network_baselines = {}
+        
+        # Count page traffic from CDP Network events. Selenium drivers get it
+        # through chromedriver's performance log, which buffers until read,
+        # so it is off unless measuring. Totals are per tab (target id).
+        self.count_network = count_network
+        self.network_totals = {}
+        
+        # Look at every page at least this often for stalls, offline
+        # banners and raids, and recover with backoff
+        self.watchdog = watchdog
+        self.watchdog_interval = watchdog_interval
+        self.watchdogs = {}
+        self.metrics.collectors.append(self.collect_watchdog_metrics)
         
     def authenticate(self):
         """Open a visible Chrome window for Twitch login"""
+        import undetected_chromedriver as uc
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
         options = uc.ChromeOptions()
         
         # Essential options to bypass detection
@@ -69,8 +1771,9 @@ class TwitchPointsManager:
                 EC.presence_of_element_located((By.CSS_SELECTOR, '[data-a-target="user-menu-toggle"]'))
             )
             
-            # Get and store cookies for other instances
+            # Get and store cookies for other instances and later runs
             self.cookies = self.auth_driver.get_cookies()
+            self.session_store.save(self.cookies)
             
             self.authenticated = True
             print("Successfully authenticated!")
@@ -79,91 +1782,1283 @@ class TwitchPointsManager:
             print(f"Authentication failed: {e}")
             return False
         
-    def create_driver(self, channel):
+    def ensure_session(self):
+        """Reuse the saved session, only log in again when it is stale"""
+        cookies = self.session_store.load()
+        if cookies:
+            self.cookies = cookies
+            self.authenticated = True
+            print("Using saved Twitch session")
+            return True
+        return self.authenticate()
+        
+    def chrome_options(self):
+        import undetected_chromedriver as uc
         options = uc.ChromeOptions()
         options.add_argument('--mute-audio')
         options.add_argument('--headless')
         options.add_argument('--disable-blink-features=AutomationControlled')
         options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36')
         
+        if self.shared_browsers or self.engine:
+            # Background tabs must keep playing and running timers
+            options.add_argument('--disable-background-timer-throttling')
+            options.add_argument('--disable-backgrounding-occluded-windows')
+            options.add_argument('--disable-renderer-backgrounding')
+            options.add_argument('--autoplay-policy=no-user-gesture-required')
+        
+        if self.low_resource:
+            options.add_argument('--window-size=480,270')
+            options.add_argument('--disable-gpu')
+        
+        if self.count_network and not self.engine:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+            options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+        
+        return options
+        
+    def http_session(self):
+        """Pooled session shared by every HTTP watched channel, carrying the login"""
+        with self.launch_lock:
+            if self.http is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=2)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['Client-ID'] = TWITCH_CLIENT_ID
+                for cookie in self.cookies:
+                    session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', '.twitch.tv'))
+                    if cookie['name'] == 'auth-token':
+                        session.headers['Authorization'] = f"OAuth {cookie['value']}"
+                self.http = session
+            return self.http
+        
+    def launch_browser(self):
+        import undetected_chromedriver as uc
         driver = uc.Chrome(
-            options=options,
+            options=self.chrome_options(),
             suppress_welcome=True,
             use_subprocess=True
         )
         
-        # Add authenticated cookies
+        # Add authenticated cookies in one call, before any page is loaded
         if self.cookies:
-            driver.get('https://twitch.tv')
-            for cookie in self.cookies:
-                driver.add_cookie(cookie)
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cdp_cookies(self.cookies)})
         
-        self.drivers[channel] = driver
+        return driver
         
-    def manage_channel(self, channel):
-        driver = self.drivers[channel]
-        driver.get(f'https://twitch.tv/{channel}')
+    def acquire_browser(self):
+        if self.pool:
+            return self.pool.acquire()
+        return self.launch_browser()
+        
+    def create_driver(self, channel):
+        if not self.shared_browsers:
+            self.drivers[channel] = self.acquire_browser()
+            return
         
-        # Wait for stream to load
-        wait = WebDriverWait(driver, 20)
+        # Launch shared browsers lazily, then fill the least loaded one. Only
+        # the slot is reserved under the lock, so browsers start in parallel.
+        with self.browsers_changed:
+            # Wait for launches in flight so the new browsers get their share
+            while self.launching and len(self.browsers) + self.launching >= self.shared_browsers:
+                self.browsers_changed.wait()
+            launch = len(self.browsers) + self.launching < self.shared_browsers
+            if launch:
+                self.launching += 1
+            else:
+                browser = min(self.browsers, key=lambda b: sum(
+                    1 for used in self.channel_browser.values() if used is b))
+                self.channel_browser[channel] = browser
         
+        if launch:
+            try:
+                browser = SharedBrowser(self.acquire_browser())
+            except Exception:
+                with self.browsers_changed:
+                    self.launching -= 1
+                    self.browsers_changed.notify_all()
+                raise
+            with self.browsers_changed:
+                self.launching -= 1
+                self.browsers.append(browser)
+                self.channel_browser[channel] = browser
+                self.browsers_changed.notify_all()
+            
+            # One scheduler thread per shared browser instead of one per channel
+            self.start_thread(self.run_shared_browser, browser)
+        browser.open_tab(channel)
+        self.drivers[channel] = browser.driver
+        
+    @contextmanager
+    def channel_driver(self, channel):
+        """Yield the channel's driver, switched to its tab in shared mode"""
+        browser = self.channel_browser.get(channel)
+        if browser is None:
+            yield self.drivers[channel]
+        else:
+            with browser.tab(channel) as driver:
+                yield driver
+        
+    def open_channel(self, driver, channel):
+        if self.event_driven:
+            # Must be registered on the tab before navigating
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                'source': CLAIM_OBSERVER_SCRIPT
+            })
+        if self.low_resource:
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                'source': LOW_RESOURCE_SCRIPT
+            })
+        # Blocking is per tab, so it is set up here rather than per browser
+        if self.block_resources:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls})
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                'source': HIDE_CHAT_SCRIPT
+            })
+            if self.resource_blocker:
+                # Window handles are the tabs' DevTools target ids
+                self.resource_blocker.block(driver, driver.current_window_handle)
+        driver.execute_cdp_cmd('Performance.enable', {})
+        started = time.monotonic()
+        driver.get(f'{self.base_url}/{channel}')
+        self.metrics.observe('twitchafk_page_load_seconds', time.monotonic() - started, channel=channel)
+        driver.execute_script(VOLUME_SCRIPT)
+        # Set once so probes don't pay for it, probe_timeout() stays under 900s
+        driver.set_script_timeout(960)
+        
+    def probe_page(self, driver, channel, timeout=0):
+        """Wait for a claim and snapshot the page in a single round trip"""
+        state = driver.execute_async_script(PAGE_PROBE_SCRIPT, int(timeout * 1000))
+        self.page_states[channel] = state
+        if self.event_driven and not state['observer']:
+            # Observer missing (e.g. page reloaded outside open_channel)
+            driver.execute_script(CLAIM_OBSERVER_SCRIPT)
+        return state
+        
+    def probe_timeout(self, channel):
+        """How long a single check may block waiting for a bonus"""
+        schedule = self.schedules.get(channel)
+        if self.event_driven:
+            if schedule is None or schedule.expected_at() is None:
+                timeout = 60
+            else:
+                # The observer wakes us on a claim, so block until the window
+                timeout = max(60, min(900, schedule.expected_at() - schedule.margin - time.time()))
+            # The watchdog needs to see the page regularly
+            return min(timeout, self.watchdog_interval) if self.watchdog else timeout
+        return 0 if schedule else 20
+        
+    def next_check_at(self, channel, schedule):
+        """When a scheduled channel is next probed, capped by the watchdog"""
+        due = schedule.next_probe_at()
+        if self.watchdog:
+            due = min(due, schedule.last_probe + self.watchdog_interval)
+        return due
+        
+    def check_channel(self, driver, channel, timeout=0):
+        """Claim the bonus if it is showing, returns True when claimed"""
+        self.metrics.inc('twitchafk_probes_total', channel=channel)
+        if channel in self.schedules:
+            self.schedules[channel].record_probe()
+        state = self.probe_page(driver, channel, timeout)
+        for claim in state['claims']:
+            self.record_claim_event(channel, claim)
+        self.supervise_page(driver, channel, state)
+        return bool(state['claims'])
+        
+    def supervise_page(self, driver, channel, page):
+        """Reload or re-navigate a page that stopped earning, with backoff"""
+        # HTTP watched channels have no page to fix, their lost time still counts
+        action = self.watchdog_action(channel, page, recoverable=driver is not None)
+        if action == 'navigate':
+            driver.get(f'{self.base_url}/{channel}')
+        elif action == 'reload':
+            driver.refresh()
+        else:
+            return
+        driver.execute_script(VOLUME_SCRIPT)
+        
+    def watchdog_action(self, channel, page, recoverable=True):
+        """Feed a page snapshot to the channel's watchdog, returns the recovery that is due"""
+        watchdog = self.watchdogs.get(channel)
+        if watchdog is None:
+            return None
+        previous = watchdog.state
+        action = watchdog.update(page)
+        if watchdog.state != previous:
+            if watchdog.state == 'ok':
+                print(f"{channel} recovered from {previous}")
+                self.set_status(channel, 'watching')
+            else:
+                print(f"{channel} page is {watchdog.state}")
+                self.set_status(channel, watchdog.state)
+        if action is None or not recoverable:
+            return None
+        
+        print(f"{channel} {watchdog.state} for {time.time() - watchdog.since:.0f}s, "
+              f"{action} (attempt {watchdog.attempts})")
+        self.metrics.inc('twitchafk_recoveries_total', channel=channel, state=watchdog.state)
+        return action
+        
+    def collect_watchdog_metrics(self, metrics):
+        for channel, watchdog in list(self.watchdogs.items()):
+            for state, seconds in watchdog.lost.items():
+                metrics.set('twitchafk_lost_seconds_total', seconds, channel=channel, state=state)
+                
+    def watchdog_report(self):
+        states = list(PageWatchdog.RECOVERY)
+        print(f"{'channel':<20} {'state':>10} " + ' '.join(f"{state + ' s':>12}" for state in states))
+        for channel, watchdog in sorted(self.watchdogs.items()):
+            print(f"{channel:<20} {watchdog.state:>10} " +
+                  ' '.join(f"{watchdog.lost[state]:>12.0f}" for state in states))
+        
+    def record_claim_event(self, channel, claim):
+        """Handle a claim reported by the injected observer"""
+        if claim.get('seen'):
+            self.metrics.observe('twitchafk_claim_latency_seconds',
+                max(0, time.time() - claim['seen'] / 1000), channel=channel)
+        if claim.get('balance') is not None:
+            self.record_points(channel, claim['balance'], claimed=True)
+        elif claim.get('type') == 'claim':
+            self.metrics.inc('twitchafk_claims_total', channel=channel)
+            
+    def record_error(self, channel, error):
+        self.metrics.inc('twitchafk_exceptions_total', channel=channel, type=type(error).__name__)
+        
+    def driver_owners(self):
+        owners = {}
+        for channel, driver in list(self.drivers.items()):
+            owners.setdefault(driver, []).append(channel)
+        return owners
+        
+    def collect_driver_metrics(self, metrics):
+        for driver, channels in self.driver_owners().items():
+            processes = driver_processes(driver)
+            label = ','.join(sorted(channels))
+            metrics.set('twitchafk_driver_rss_bytes', driver_rss(driver), channels=label)
+            metrics.set('twitchafk_driver_cpu_seconds_total', process_cpu_seconds(processes), channels=label)
+            
+    def write_metrics_log(self):
+        while self.running:
+            deadline = time.monotonic() + self.metrics_interval
+            while self.running and time.monotonic() < deadline:
+                time.sleep(1)
+            try:
+                with open(self.metrics_log, 'a') as f:
+                    f.write(json.dumps({'ts': time.time(), 'metrics': self.metrics.snapshot()}) + '\n')
+            except OSError as e:
+                print(f"Could not write metrics log: {e}")
+        
+    def record_points(self, channel, points, claimed=False):
+        self.metrics.inc('twitchafk_balance_reads_total', channel=channel)
+        self.metrics.set('twitchafk_balance', points, channel=channel)
+        if claimed:
+            self.metrics.inc('twitchafk_claims_total', channel=channel)
+            if channel in self.schedules:
+                self.schedules[channel].record_claim()
+        
+        previous = self.ledger.balances.get(channel)
+        self.ledger.record(channel, points, claimed)
+        if self.bridge:
+            self.bridge.publish({
+                'type': 'claim' if claimed else 'balance',
+                'channel': channel,
+                'points': points,
+                'delta': 0 if previous is None else points - previous
+            })
+            
+    def channel_ready(self, channel):
+        """The channel's page is open and being checked for bonuses"""
+        added = self.added_at.pop(channel, None)
+        if added is not None:
+            self.first_check_delays[channel] = time.monotonic() - added
+        if channel in self.watchdogs:
+            self.watchdogs[channel].restart()
+        self.set_status(channel, 'watching')
+        
+    def startup_report(self):
+        if self.startup_seconds is not None:
+            print(f"Started {len(self.launch_times)} channels in {self.startup_seconds:.1f}s "
+                  f"with {self.startup_concurrency} parallel launches")
+        if self.pool:
+            self.pool.report()
+        for channel in sorted(set(self.launch_times) | set(self.first_check_delays) | set(self.launch_failures)):
+            if channel in self.launch_failures:
+                print(f"  {channel:<20} failed: {self.launch_failures[channel]}")
+                continue
+            launch = self.launch_times.get(channel)
+            delay = self.first_check_delays.get(channel)
+            print(f"  {channel:<20} launch {'-' if launch is None else f'{launch:.1f}s'}, "
+                  f"first claim check after {'-' if delay is None else f'{delay:.1f}s'}")
+        
+    def schedule_report(self):
+        print(f"{'channel':<20} {'interval':>9} {'probes':>7} {'claims':>7} {'probes/claim':>13}")
+        for channel, schedule in sorted(self.schedules.items()):
+            interval = '-' if schedule.interval is None else f"{schedule.interval:.0f}s"
+            ratio = f"{schedule.probes / schedule.claim_count:.1f}" if schedule.claim_count else '-'
+            print(f"{channel:<20} {interval:>9} {schedule.probes:>7} {schedule.claim_count:>7} {ratio:>13}")
+        
+    def set_status(self, channel, status):
+        if self.bridge:
+            self.bridge.publish({'type': 'status', 'channel': channel, 'status': status})
+        
+    def playback_stats(self, channel):
+        """Resolution, bandwidth and renderer CPU of a channel since the last call"""
+        if channel in self.http_transports:
+            # Nothing is played without a browser
+            return None
+        if self.engine:
+            stats, task_seconds = self.engine.playback_sample(channel)
+        else:
+            with self.channel_driver(channel) as driver:
+                stats = driver.execute_script(PLAYBACK_STATS_SCRIPT)
+                metrics = driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+            task_seconds = next((m['value'] for m in metrics if m['name'] == 'TaskDuration'), 0)
+        if stats is None:
+            return None
+        
+        now = time.monotonic()
+        previous = self.playback_samples.get(channel)
+        self.playback_samples[channel] = (now, stats['media_bytes'], task_seconds)
+        
+        report = {
+            'resolution': f"{stats['height']}p",
+            'playing': stats['playing'],
+            'dropped_frames': stats['dropped_frames'],
+            'kbps': None,
+            'cpu_percent': None
+        }
+        if previous and now > previous[0]:
+            elapsed = now - previous[0]
+            report['kbps'] = (stats['media_bytes'] - previous[1]) * 8 / 1000 / elapsed
+            report['cpu_percent'] = (task_seconds - previous[2]) / elapsed * 100
+        return report
+        
+    def report_playback(self):
+        print(f"{'channel':<20} {'res':>6} {'kbps':>8} {'cpu %':>6} dropped")
+        for channel in sorted(self.active_channels()):
+            try:
+                stats = self.playback_stats(channel)
+            except Exception as e:
+                print(f"{channel:<20} error: {e}")
+                continue
+            if stats is None:
+                print(f"{channel:<20} no player")
+                continue
+            kbps = '-' if stats['kbps'] is None else f"{stats['kbps']:.0f}"
+            cpu = '-' if stats['cpu_percent'] is None else f"{stats['cpu_percent']:.1f}"
+            print(f"{channel:<20} {stats['resolution']:>6} {kbps:>8} {cpu:>6} {stats['dropped_frames']}")
+        
+    def drain_network_log(self, driver):
+        """Fold the driver's buffered Network events into the per-tab totals"""
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])
+            event = message['message']
+            totals = self.network_totals.setdefault(message.get('webview'), Counter())
+            count_network_event(totals, event['method'], event.get('params', {}))
+            
+    def network_stats(self, channel):
+        """Requests, bytes and blocked requests of the channel's page so far"""
+        if channel in self.http_transports or not self.count_network:
+            return None
+        if self.engine:
+            return self.engine.network_sample(channel)
+        with self.channel_driver(channel) as driver:
+            # The log holds every tab of a shared browser, the others' events
+            # are kept for their own report
+            self.drain_network_log(driver)
+            return Counter(self.network_totals.get(driver.current_window_handle))
+            
+    def report_network(self):
+        """Per-channel page traffic, and what blocking saved when a baseline is known"""
+        if not self.count_network:
+            print("Network counting is off, start the manager with count_network=True")
+            return {}
+        print(f"{'channel':<20} {'requests':>9} {'MB':>8} {'blocked':>8} {'saved req':>10} {'saved MB':>9}")
+        results = {}
+        for channel in sorted(self.active_channels()):
+            try:
+                stats = self.network_stats(channel)
+            except Exception as e:
+                print(f"{channel:<20} error: {e}")
+                continue
+            if stats is None:
+                print(f"{channel:<20} no page")
+                continue
+            results[channel] = stats
+            baseline = self.network_baselines.get(channel)
+            saved_requests = '-' if baseline is None else baseline['requests'] - stats['requests']
+            saved_mb = '-' if baseline is None else f"{(baseline['bytes'] - stats['bytes']) / 2**20:.1f}"
+            print(f"{channel:<20} {stats['requests']:>9} {stats['bytes'] / 2**20:>8.1f} "
+                  f"{stats['blocked']:>8} {saved_requests:>10} {saved_mb:>9}")
+        return results
+        
+    def manage_channel(self, channel):
+        transport = self.http_transports.get(channel) or BrowserTransport(self, channel)
         try:
-            # Set volume to 5%
-            volume_script = """
-                const video = document.querySelector('video');
-                if (video) {
-                    video.volume = 0.05;
-                    video.muted = false;
-                }
-            """
-            driver.execute_script(volume_script)
-            
-            while self.running:
+            transport.open()
+            self.channel_ready(channel)
+            
+            while self.running and transport.alive():
+                schedule = self.schedules.get(channel)
+                if schedule and not self.event_driven and not transport.paced:
+                    # Idle until the next bonus is due, then probe densely
+                    self.sleep_until(self.next_check_at(channel, schedule), channel)
+                    if not (self.running and transport.alive()):
+                        break
                 try:
-                    # Check for point claim button
-                    claim_button = wait.until(EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, '[aria-label="Claim Bonus"]')
-                    ))
-                    claim_button.click()
-                    
-                    # Get current points
-                    points_element = driver.find_element(By.CSS_SELECTOR, 
-                        '[data-test-selector="balance-string"]')
-                    points = int(''.join(filter(str.isdigit, points_element.text)))
-                    
-                    # Update extension storage
-                    update_script = f"""
-                        chrome.storage.local.get(['channels'], result => {{
-                            const channels = result.channels || {{}};
-                            channels['{channel}'] = {{ points: {points} }};
-                            chrome.storage.local.set({{ channels: channels }});
-                        }});
-                    """
-                    driver.execute_script(update_script)
-                    
-                except:
-                    time.sleep(30)  # Wait before next check
+                    # Event mode blocks inside the page until a claim happens
+                    claimed = transport.check(timeout=self.probe_timeout(channel))
+                    if claimed or self.event_driven or schedule or transport.paced:
+                        continue
+                except Exception as e:
+                    self.record_error(channel, e)
+                time.sleep(30)  # Wait before next check
                     
         except Exception as e:
             print(f"Error in {channel} thread: {e}")
+            self.record_error(channel, e)
+            self.set_status(channel, 'error')
             
-    def start(self, channels):
+    def sleep_until(self, deadline, channel=None):
+        while self.running and (channel is None or channel in self.drivers or channel in self.http_transports):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 1))
+            
+    def run_shared_browser(self, browser, interval=5):
+        """Round-robin scheduler for every tab of a shared browser"""
+        while self.running and browser in self.browsers:
+            next_due = time.time() + interval
+            for channel in list(browser.handles):
+                if not self.running:
+                    break
+                
+                # Skip tabs whose next bonus isn't due, without switching to them
+                schedule = self.schedules.get(channel)
+                if schedule and channel in browser.opened:
+                    due = self.next_check_at(channel, schedule)
+                    if due > time.time():
+                        next_due = min(next_due, due)
+                        continue
+                try:
+                    with browser.tab(channel) as driver:
+                        # Tabs added after startup get opened on their first turn
+                        if channel not in browser.opened:
+                            browser.opened.add(channel)
+                            self.open_channel(driver, channel)
+                            self.channel_ready(channel)
+                        else:
+                            self.check_channel(driver, channel)
+                except Exception as e:
+                    print(f"Error in {channel} tab: {e}")
+                    self.record_error(channel, e)
+            time.sleep(max(0.5, min(interval, next_due - time.time())))
+            
+    def start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args)
+        thread.daemon = True
+        thread.start()
+        self.threads.append(thread)
+        return thread
+        
+    def active_channels(self):
+        if self.engine:
+            return set(self.engine.tasks) | set(self.http_transports)
+        return set(self.drivers) | set(self.http_transports)
+        
+    def add_channel(self, channel):
+        # Reserve the channel first so two workers can't both launch it
+        with self.launch_lock:
+            if channel in self.starting or channel in self.active_channels():
+                return
+            self.starting.add(channel)
+        try:
+            return self.start_watcher(channel)
+        finally:
+            with self.launch_lock:
+                self.starting.discard(channel)
+                
+    def start_watcher(self, channel):
+        self.set_status(channel, 'starting')
+        self.added_at[channel] = time.monotonic()
+        if self.predictive:
+            # Kept across remove/add so a restarted channel keeps its cadence
+            self.schedules.setdefault(channel, ClaimSchedule())
+        if self.watchdog:
+            # Also kept across remove/add so lost time adds up per channel
+            self.watchdogs.setdefault(channel, PageWatchdog(channel))
+        # Both open the page before returning, so launch_channel's retries,
+        # timing and failure reporting cover them too
+        if self.channel_transports.get(channel, self.transport) == 'http':
+            transport = HttpTransport(self, channel)
+            transport.open()
+            self.http_transports[channel] = transport
+            self.start_thread(self.manage_channel, channel)
+            return
+        if self.engine:
+            self.engine.add_channel(channel).result()
+            return
+        
+        self.create_driver(channel)
+        if not self.shared_browsers:
+            self.start_thread(self.manage_channel, channel)
+            
+    def launch_channel(self, channel, retries=2):
+        """add_channel with retries, returns how long the launch took"""
+        for attempt in range(retries + 1):
+            started = time.monotonic()
+            try:
+                self.add_channel(channel)
+                return time.monotonic() - started
+            except Exception as e:
+                self.record_error(channel, e)
+                self.channel_browser.pop(channel, None)
+                if attempt == retries or not self.running:
+                    raise
+                print(f"Launching {channel} failed ({e}), retrying")
+                time.sleep(2 ** attempt)
+                
+    def start_channels(self, channels):
+        """Launch channels in parallel, one failure doesn't stop the others"""
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.startup_concurrency) as executor:
+            futures = {executor.submit(self.launch_channel, channel): channel for channel in channels}
+            for future in as_completed(futures):
+                channel = futures[future]
+                try:
+                    self.launch_times[channel] = future.result()
+                    self.launch_failures.pop(channel, None)
+                except Exception as e:
+                    print(f"Could not launch {channel}: {e}")
+                    self.launch_failures[channel] = e
+                    self.set_status(channel, 'error')
+        return time.monotonic() - started
+        
+    def refresh_cookies(self, driver):
+        """Carry the live session over from a browser that is about to go away"""
+        try:
+            cookies = driver.get_cookies()
+        except Exception:
+            return
+        if any(cookie.get('name') == 'auth-token' for cookie in cookies):
+            self.cookies = cookies
+            self.session_store.save(cookies)
+            
+    def recycle_driver(self, driver):
+        """Replace a browser with a fresh one, keeping its channels and their schedules"""
+        channels = [channel for channel, used in list(self.drivers.items()) if used is driver]
+        self.refresh_cookies(driver)
         for channel in channels:
-            self.create_driver(channel)
-            thread = threading.Thread(target=self.manage_channel, args=(channel,))
+            self.set_status(channel, 'recycling')
+            self.added_at[channel] = time.monotonic()
+        
+        if self.engine:
+            self.engine.recycle_browser(driver)
+            return
+        
+        if not self.shared_browsers:
+            for channel in channels:
+                self.drivers[channel] = self.acquire_browser()
+                self.start_thread(self.manage_channel, channel)
+        else:
+            old = next(b for b in self.browsers if b.driver is driver)
+            browser = SharedBrowser(self.acquire_browser())
+            for channel in channels:
+                browser.open_tab(channel)
+            with self.launch_lock:
+                self.browsers[self.browsers.index(old)] = browser
+                for channel in channels:
+                    self.channel_browser[channel] = browser
+                    self.drivers[channel] = browser.driver
+            self.start_thread(self.run_shared_browser, browser)
+        
+        # The old channel thread exits once it notices its driver is gone
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error closing recycled browser: {e}")
+        
+    def set_channels(self, channels):
+        """Converge on the given channel list, only touching what changed"""
+        desired = list(dict.fromkeys(channels))
+        active = self.active_channels()
+        self.channels = desired
+        
+        removed = [channel for channel in active if channel not in desired]
+        for channel in removed:
+            try:
+                self.remove_channel(channel)
+            except Exception as e:
+                print(f"Error removing {channel}: {e}")
+        
+        # The liveness supervisor starts new channels once they are live
+        added = [] if self.liveness else [channel for channel in desired if channel not in active]
+        if added:
+            self.start_channels(added)
+        return added, removed
+        
+    def watch_config(self, path, interval=2):
+        """Apply edits to a JSON channel list file while running"""
+        last_modified = None
+        while self.running:
+            try:
+                modified = os.stat(path).st_mtime
+                if modified != last_modified:
+                    last_modified = modified
+                    added, removed = self.set_channels(load_channels(path))
+                    if added or removed:
+                        print(f"Channels updated: +{', '.join(added) or '-'} / -{', '.join(removed) or '-'}")
+            except (OSError, ValueError) as e:
+                # Keep running with the current list until the file is fixed
+                print(f"Could not read {path}: {e}")
+            time.sleep(interval)
+        
+    def remove_channel(self, channel, status='stopped'):
+        self.set_status(channel, status)
+        if self.http_transports.pop(channel, None) is not None:
+            # Its thread notices and exits on its next check
+            return
+        if self.engine:
+            return self.engine.remove_channel(channel)
+        
+        driver = self.drivers.pop(channel, None)
+        browser = self.channel_browser.pop(channel, None)
+        if browser is not None:
+            browser.close_tab(channel)
+        elif driver is not None:
+            driver.quit()
+            
+    def watch_liveness(self, interval=60):
+        """Open channels when they go live, tear them down when they end"""
+        while self.running:
+            try:
+                live = self.liveness.live_channels(self.channels)
+            except Exception as e:
+                # Keep the current set rather than guessing
+                print(f"Liveness check failed: {e}")
+                live = None
+            
+            if live is not None:
+                active = self.active_channels()
+                went_live = [channel for channel in self.channels if channel in live and channel not in active]
+                for channel in self.channels:
+                    if channel not in live and channel in active:
+                        print(f"{channel} went offline, closing watcher")
+                        try:
+                            self.remove_channel(channel, status='offline')
+                        except Exception as e:
+                            print(f"Error updating {channel}: {e}")
+                if went_live:
+                    print(f"Live now: {', '.join(went_live)}, starting watchers")
+                    self.start_channels(went_live)
+            
+            deadline = time.monotonic() + interval
+            while self.running and time.monotonic() < deadline:
+                time.sleep(1)
+            
+    def start(self, channels):
+        self.channels = list(dict.fromkeys(channels))
+        if self.bridge:
+            try:
+                self.bridge.start()
+            except OSError as e:
+                print(f"Extension bridge unavailable: {e}")
+                self.bridge = None
+        if self.pool:
+            self.pool.start()
+        if self.metrics_server:
+            self.metrics_server.start()
+        if self.metrics_log:
+            self.start_thread(self.write_metrics_log)
+        if self.governor:
+            self.start_thread(self.governor.run)
+        
+        if self.liveness:
+            self.start_thread(self.watch_liveness)
+            return
+        
+        self.startup_seconds = self.start_channels(self.channels)
+        self.startup_report()
+            
+    def stop(self, timeout=15):
+        """Shut everything down within `timeout` seconds, killing what hangs"""
+        deadline = time.monotonic() + timeout
+        
+        # Signal every worker first so none of them starts new browser work
+        self.running = False
+        drivers = set(self.drivers.values())
+        drivers.update(browser.driver for browser in self.browsers)
+        if self.pool:
+            drivers.update(self.pool.drain())
+        if self.engine:
+            drivers.update(driver for driver, connection in self.engine.browsers)
+        if self.auth_driver:
+            drivers.add(self.auth_driver)
+        
+        # Remember the process trees now, quit() makes them hard to find
+        processes = {proc.pid: proc for driver in drivers for proc in driver_processes(driver)}
+        
+        if self.engine:
+            try:
+                self.engine.stop(timeout=max(1, deadline - time.monotonic()))
+            except Exception as e:
+                print(f"Async engine did not stop cleanly: {e}")
+        if self.resource_blocker:
+            try:
+                self.resource_blocker.stop()
+            except Exception as e:
+                print(f"Resource blocker did not stop cleanly: {e}")
+        
+        # Quit all browsers at once, a hung one can't hold up the rest
+        quitters = []
+        for driver in drivers:
+            thread = threading.Thread(target=quit_driver, args=(driver,))
             thread.daemon = True
             thread.start()
-            
+            quitters.append((driver, thread))
+        timed_out = 0
+        for driver, thread in quitters:
+            thread.join(max(0, deadline - time.monotonic()))
+            if thread.is_alive():
+                timed_out += 1
+        
+        killed = reap_processes(processes.values())
+        
+        self.http_transports.clear()
+        if self.http:
+            self.http.close()
+        self.ledger.close()
+        if self.bridge:
+            self.bridge.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        
+        report = {
+            'browsers': len(drivers),
+            'timed_out': timed_out,
+            'killed': killed,
+            'seconds': timeout - (deadline - time.monotonic())
+        }
+        print(f"Stopped {len(drivers)} browsers in {report['seconds']:.1f}s"
+              + (f", {timed_out} quit() calls timed out" if timed_out else "")
+              + (f", killed {len(killed)} leftover processes" if killed else ""))
+        for name, pid in killed:
+            print(f"  killed {name} ({pid})")
+        return report
+
+def quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+def reap_processes(processes, grace=3):
+    """Terminate, then kill, any of the processes still running"""
+    import psutil
+    alive = []
+    for proc in processes:
+        try:
+            if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
+                alive.append((proc, proc.name()))
+        except psutil.NoSuchProcess:
+            pass
+    if not alive:
+        return []
+    
+    for proc, name in alive:
+        try:
+            proc.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    gone, still_alive = psutil.wait_procs([proc for proc, name in alive], timeout=grace)
+    for proc in still_alive:
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+    return [(name, proc.pid) for proc, name in alive]
+
+def driver_processes(driver):
+    """All chromedriver/chrome processes belonging to a driver"""
+    import psutil
+    pids = {getattr(driver, 'browser_pid', None)}
+    service = getattr(driver, 'service', None)
+    if service is not None and getattr(service, 'process', None) is not None:
+        pids.add(service.process.pid)
+    
+    processes = {}
+    for pid in pids:
+        if pid is None:
+            continue
+        try:
+            root = psutil.Process(pid)
+            for proc in [root] + root.children(recursive=True):
+                processes[proc.pid] = proc
+        except psutil.NoSuchProcess:
+            pass
+    return list(processes.values())
+
+def driver_rss(driver, processes=None):
+    import psutil
+    total = 0
+    for proc in driver_processes(driver) if processes is None else processes:
+        try:
+            total += proc.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+def compare_memory(channels, shared_browsers=1, settle=60):
+    """Measure memory for one browser per channel, shared tabs and HTTP watchers
+    
+    Counts Chrome's RSS plus what this process grew by while watching.
+    """
+    import psutil
+    results = {}
+    modes = (
+        ('browser per channel', {}),
+        (f'{shared_browsers} shared browser(s)', {'shared_browsers': shared_browsers}),
+        ('http, no browser', {'transport': 'http'})
+    )
+    for label, options in modes:
+        own_rss = psutil.Process().memory_info().rss
+        manager = TwitchPointsManager(bridge_port=None, **options)
+        manager.cookies = manager.session_store.load() or []
+        manager.start(channels)
+        time.sleep(settle)
+        
+        drivers = set(manager.drivers.values())
+        rss = sum(driver_rss(driver) for driver in drivers)
+        rss += max(0, psutil.Process().memory_info().rss - own_rss)
+        process_count = sum(len(driver_processes(driver)) for driver in drivers)
+        results[label] = (rss, process_count)
+        manager.stop()
+    
+    print(f"\nMemory comparison for {len(channels)} channels:")
+    for label, (rss, process_count) in results.items():
+        print(f"  {label:<24} {rss / 2**20:8.1f} MB total, "
+              f"{rss / 2**20 / len(channels):6.1f} MB/channel, {process_count} processes")
+    return results
+
+def compare_blocking(channels, settle=120):
+    """Load each channel with and without resource blocking and report the savings"""
+    results = {}
+    for label, block in (('unblocked', False), ('blocked', True)):
+        manager = TwitchPointsManager(bridge_port=None, block_resources=block, count_network=True)
+        manager.cookies = manager.session_store.load() or []
+        if block:
+            manager.network_baselines = results['unblocked']['network']
+        manager.start(channels)
+        time.sleep(settle)
+        
+        print(f"\n{label}:")
+        network = manager.report_network()
+        drivers = set(manager.drivers.values())
+        rss = sum(driver_rss(driver) for driver in drivers)
+        results[label] = {'network': network, 'rss_mb_per_channel': rss / 2**20 / len(channels)}
+        manager.stop()
+    
+    print(f"\nChrome RSS per channel: {results['unblocked']['rss_mb_per_channel']:.1f} MB unblocked, "
+          f"{results['blocked']['rss_mb_per_channel']:.1f} MB blocked")
+    return results
+
+# Stand-in channel page: a player, a balance and a Claim Bonus button that
+# shows up every `interval` ms. The page reports when a bonus was shown,
+# claimed (with click latency) or missed (still unclaimed when the next one
+# was due) back to the FakeTwitchServer. HTTP watchers never run the page,
+# the server tracks their bonuses itself.
+FAKE_CHANNEL_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>{channel} - Twitch</title></head>
+<body>
+    <script>window.__settings = {{"spade_url":"{spade_url}"}};</script>
+    <video muted autoplay loop></video>
+    <span data-test-selector="balance-string">{balance}</span>
+    <div id="bonus-slot"></div>
+    <script>
+        const channel = {channel_json};
+        const interval = {interval};
+        let balance = {balance};
+        let shownAt = null;
+
+        const report = (kind, data) => fetch('/report', {{
+            method: 'POST',
+            body: JSON.stringify(Object.assign({{ kind: kind, channel: channel }}, data))
+        }});
+
+        const showBonus = () => {{
+            const slot = document.getElementById('bonus-slot');
+            if (shownAt !== null) {{
+                report('missed', {{}});
+                slot.innerHTML = '';
+            }}
+            const button = document.createElement('button');
+            button.setAttribute('aria-label', 'Claim Bonus');
+            button.textContent = '+50';
+            button.addEventListener('click', () => {{
+                const latency = performance.now() - shownAt;
+                shownAt = null;
+                button.remove();
+                balance += 50;
+                document.querySelector('[data-test-selector="balance-string"]').textContent =
+                    balance.toLocaleString('en-US');
+                report('claimed', {{ latency: latency, balance: balance }});
+            }});
+            shownAt = performance.now();
+            slot.appendChild(button);
+            report('shown', {{}});
+        }};
+
+        // Spread channels out so they don't all show a bonus at once
+        setTimeout(() => {{
+            showBonus();
+            setInterval(showBonus, interval);
+        }}, Math.random() * interval);
+    </script>
+</body>
+</html>
+"""
+
+class FakeTwitchServer:
+    """Local HTTP server serving FAKE_CHANNEL_PAGE for any channel path, plus
+    the GQL and presence endpoints the HTTP transport talks to"""
+    def __init__(self, bonus_interval=60, host='127.0.0.1', port=0):
+        self.bonus_interval = bonus_interval
+        self.stats = {}
+        self.bonuses = {}
+        # Channels that answer GQL as not streaming, see set_live()
+        self.offline = set()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_port}'
+        
+    def handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                channel = self.path.strip('/').split('/')[0].split('?')[0] or 'index'
+                with fake.lock:
+                    balance = fake.channel_stats(channel)['balance']
+                self.respond(FAKE_CHANNEL_PAGE.format(
+                    channel=channel,
+                    channel_json=json.dumps(channel),
+                    spade_url=f'{fake.url}/spade',
+                    balance=balance,
+                    interval=int(fake.bonus_interval * 1000)
+                ).encode(), 'text/html')
+                
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path == '/gql':
+                    request = json.loads(body)
+                    with fake.lock:
+                        # A list is a batch of operations, answered in order
+                        if isinstance(request, list):
+                            result = [{'data': fake.gql(op['query'], op['variables'])} for op in request]
+                        else:
+                            result = {'data': fake.gql(request['query'], request['variables'])}
+                    self.respond(json.dumps(result).encode(), 'application/json')
+                    return
+                if self.path == '/spade':
+                    with fake.lock:
+                        fake.channel_stats(fake.presence_channel(body))['minutes'] += 1
+                    self.respond(b'', 'text/plain')
+                    return
+                
+                report = json.loads(body)
+                with fake.lock:
+                    stats = fake.channel_stats(report['channel'])
+                    stats[report['kind']] += 1
+                    if report['kind'] == 'claimed':
+                        stats['latencies'].append(report['latency'] / 1000)
+                        stats['balance'] = report['balance']
+                self.respond(b'', 'text/plain')
+                
+            def respond(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+        
+    def channel_stats(self, channel):
+        return self.stats.setdefault(channel, {
+            'balance': 1000, 'shown': 0, 'claimed': 0, 'missed': 0, 'latencies': [], 'minutes': 0
+        })
+        
+    def bonus(self, channel):
+        """The channel's current bonus, advanced to now like the page would"""
+        bonus = self.bonuses.setdefault(channel, {
+            'offset': time.time() - random.random() * self.bonus_interval,
+            'index': -1, 'shown_at': None, 'claimed': True
+        })
+        stats = self.channel_stats(channel)
+        index = int((time.time() - bonus['offset']) / self.bonus_interval)
+        if index > bonus['index']:
+            skipped = index - bonus['index'] - 1 if bonus['index'] >= 0 else 0
+            stats['shown'] += skipped + 1
+            stats['missed'] += skipped + (0 if bonus['claimed'] else 1)
+            bonus.update(index=index, claimed=False,
+                         shown_at=bonus['offset'] + index * self.bonus_interval)
+        return bonus
+        
+    def gql(self, query, variables):
+        if 'claimCommunityPoints' in query:
+            channel, index = variables['input']['claimID'].rsplit(':', 1)
+            bonus = self.bonus(channel)
+            stats = self.channel_stats(channel)
+            if bonus['claimed'] or int(index) != bonus['index']:
+                return {'claimCommunityPoints': {'currentPoints': stats['balance'], 'error': {'code': 'NOT_FOUND'}}}
+            bonus['claimed'] = True
+            stats['claimed'] += 1
+            stats['latencies'].append(time.time() - bonus['shown_at'])
+            stats['balance'] += 50
+            return {'claimCommunityPoints': {'currentPoints': stats['balance'], 'error': None}}
+        
+        channel = variables['login']
+        stream = None if channel in self.offline else {'id': f'{channel}-stream'}
+        if 'communityPoints' not in query:
+            # Liveness lookup (STREAM_QUERY)
+            return {'user': {'stream': stream}}
+        
+        bonus = self.bonus(channel)
+        claim = None if bonus['claimed'] else {'id': f"{channel}:{bonus['index']}"}
+        return {
+            'currentUser': {'id': '1'},
+            'user': {
+                'id': channel,
+                'stream': stream,
+                'channel': {'self': {'communityPoints': {
+                    'balance': self.channel_stats(channel)['balance'],
+                    'availableClaim': claim
+                }}}
+            }
+        }
+        
+    def set_live(self, channel, live=True):
+        with self.lock:
+            if live:
+                self.offline.discard(channel)
+            else:
+                self.offline.add(channel)
+        
+    def presence_channel(self, body):
+        payload = parse_qs(body.decode())['data'][0]
+        return json.loads(base64.b64decode(payload))[0]['properties']['channel']
+        
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        
     def stop(self):
-        self.running = False
-        for driver in self.drivers.values():
-            driver.quit()
+        self.server.shutdown()
+        self.server.server_close()
+
+def percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+def count_webdriver_calls(driver, counter):
+    """Count every WebDriver command (including CDP calls) a driver sends"""
+    if getattr(driver, 'counted_execute', False):
+        return
+    execute = driver.execute
+    def counted(*args, **kwargs):
+        counter[0] += 1
+        return execute(*args, **kwargs)
+    driver.execute = counted
+    driver.counted_execute = True
+
+def process_cpu_seconds(processes):
+    import psutil
+    total = 0
+    for proc in processes:
+        try:
+            times = proc.cpu_times()
+            total += times.user + times.system
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+def run_benchmark(channel_count=5, duration=300, bonus_interval=60, warmup=30, **options):
+    """Drive TwitchPointsManager against FakeTwitchServer and report per-channel costs"""
+    import psutil
+    server = FakeTwitchServer(bonus_interval=bonus_interval)
+    server.start()
+    
+    options.setdefault('bridge_port', None)
+    options.setdefault('ledger', PointsLedger(':memory:'))
+    options.setdefault('gql_url', f'{server.url}/gql')
+    if options.get('live_only'):
+        options.setdefault('liveness', LivenessChecker(gql_url=f'{server.url}/gql'))
+    own_process = psutil.Process()
+    own_rss = own_process.memory_info().rss
+    manager = TwitchPointsManager(base_url=server.url, **options)
+    channels = [f'bench{i}' for i in range(channel_count)]
+    
+    try:
+        manager.start(channels)
+        deadline = time.monotonic() + warmup
+        while time.monotonic() < deadline and len(manager.first_check_delays) < channel_count:
+            time.sleep(1)
+        
+        # Measurement window starts once every channel is being watched
+        with server.lock:
+            for stats in server.stats.values():
+                stats.update(shown=0, claimed=0, missed=0, latencies=[])
+        calls = [0]
+        drivers = set(manager.drivers.values())
+        for driver in drivers:
+            count_webdriver_calls(driver, calls)
+        cdp_start = sum(connection.next_id for driver, connection in manager.engine.browsers) if manager.engine else 0
+        http_start = sum(transport.requests for transport in manager.http_transports.values())
+        probes_start = sum(value for (name, labels), value in manager.metrics.values.items()
+                           if name == 'twitchafk_probes_total')
+        # This process too, it is all there is for HTTP watched channels
+        processes = [own_process] + [proc for driver in drivers for proc in driver_processes(driver)]
+        cpu_start = process_cpu_seconds(processes)
+        started = time.monotonic()
+        
+        time.sleep(duration)
+        
+        elapsed = time.monotonic() - started
+        cpu = process_cpu_seconds(processes) - cpu_start
+        rss = sum(driver_rss(driver) for driver in drivers)
+        rss += max(0, own_process.memory_info().rss - own_rss)
+        calls[0] += sum(transport.requests for transport in manager.http_transports.values()) - http_start
+        if manager.engine:
+            calls[0] += sum(connection.next_id for driver, connection in manager.engine.browsers) - cdp_start
+        probes = sum(value for (name, labels), value in manager.metrics.values.items()
+                     if name == 'twitchafk_probes_total') - probes_start
+    finally:
+        manager.stop()
+        server.stop()
+    
+    with server.lock:
+        stats = [server.channel_stats(channel) for channel in channels]
+    latencies = [latency for s in stats for latency in s['latencies']]
+    claimed = sum(s['claimed'] for s in stats)
+    results = {
+        'channels': channel_count,
+        'seconds': elapsed,
+        'bonuses': sum(s['shown'] for s in stats),
+        'claimed': claimed,
+        'missed': sum(s['missed'] for s in stats),
+        'latency_p50': percentile(latencies, 50),
+        'latency_p90': percentile(latencies, 90),
+        'latency_p99': percentile(latencies, 99),
+        'latency_mean': statistics.mean(latencies) if latencies else None,
+        'calls_per_minute': calls[0] / elapsed * 60,
+        'probes_per_claim': probes / claimed if claimed else None,
+        'cpu_percent_per_channel': cpu / elapsed * 100 / channel_count,
+        'rss_mb_per_channel': rss / 2**20 / channel_count,
+        'first_check_seconds': dict(manager.first_check_delays)
+    }
+    
+    print(f"\nBenchmark: {channel_count} channels for {elapsed:.0f}s, bonus every {bonus_interval}s")
+    print(f"  bonuses shown {results['bonuses']}, claimed {results['claimed']}, missed {results['missed']}")
+    if latencies:
+        print(f"  claim latency p50 {results['latency_p50']:.2f}s  p90 {results['latency_p90']:.2f}s  "
+              f"p99 {results['latency_p99']:.2f}s")
+    print(f"  WebDriver/CDP/HTTP calls per minute {results['calls_per_minute']:.1f}")
+    if results['probes_per_claim'] is not None:
+        print(f"  probes per claim {results['probes_per_claim']:.1f}")
+    print(f"  per channel: CPU {results['cpu_percent_per_channel']:.1f}%  RSS {results['rss_mb_per_channel']:.1f} MB")
+    return results
+
+def channel_name(value):
+    """Accept either a channel name or a twitch.tv URL"""
+    value = value.strip()
+    if 'twitch.tv/' in value:
+        value = value.split('twitch.tv/')[1].split('/')[0]
+    return value.lower()
+
+def load_channels(path):
+    with open(path) as f:
+        channels = json.load(f)
+    if not isinstance(channels, list):
+        raise ValueError("expected a JSON list of channel names")
+    return [channel_name(channel) for channel in channels if str(channel).strip()]
+
+EXTENSION_DIR = "twitch_points_manager"
+EXTENSION_ZIP = "twitch_points_manager.zip"
+
+# Fixed timestamp so identical inputs always produce an identical zip
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+def minify_js(source):
+    """Drop indentation, blank lines and whole-line // comments"""
+    lines = []
+    for line in source.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith('//'):
+            lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+class ExtensionBuild:
+    """Writes generated extension assets only when their content changed"""
+    def __init__(self, minify=None, hashes_path="twitch_points_manager.hashes.json"):
+        self.hashes_path = hashes_path
+        self.changed = []
+        self.unchanged = []
+        try:
+            with open(hashes_path) as f:
+                self.hashes = json.load(f)
+        except (OSError, ValueError):
+            self.hashes = {}
+        # Without an explicit choice, keep building the way the last build did
+        last_minify = self.hashes.pop('minify', False)
+        self.minify = last_minify if minify is None else minify
+            
+    def write(self, path, content):
+        if isinstance(content, str):
+            if self.minify and path.endswith('.js'):
+                content = minify_js(content)
+            content = content.encode()
+        digest = hashlib.sha256(content).hexdigest()
+        
+        if os.path.exists(path):
+            known = self.hashes.get(path)
+            if known is None:
+                # No cache entry yet, fall back to hashing what's on disk
+                with open(path, 'rb') as f:
+                    known = hashlib.sha256(f.read()).hexdigest()
+            if known == digest:
+                self.hashes[path] = digest
+                self.unchanged.append(path)
+                return False
+        
+        with open(path, 'wb') as f:
+            f.write(content)
+        self.hashes[path] = digest
+        self.changed.append(path)
+        return True
+        
+    def save(self):
+        with open(self.hashes_path, 'w') as f:
+            json.dump(dict(self.hashes, minify=self.minify), f, indent=2, sort_keys=True)
 
 def create_directory_structure():
     # Create main extension directory
     os.makedirs("twitch_points_manager", exist_ok=True)
 
-def create_manifest():
+def create_manifest(build):
     manifest = {
         "manifest_version": 3,
         "name": "Twitch Points Manager",
@@ -172,7 +3067,7 @@ def create_manifest():
         "permissions": [
             "storage",
             "tabs",
-            "scripting"
+            "alarms"
         ],
         "host_permissions": [
             "https://*.twitch.tv/*"
@@ -194,10 +3089,9 @@ def create_manifest():
         }
     }
     
-    with open("twitch_points_manager/manifest.json", "w") as f:
-        json.dump(manifest, f, indent=2)
+    build.write("twitch_points_manager/manifest.json", json.dumps(manifest, indent=2))
 
-def create_popup_html():
+def create_popup_html(build):
     popup_html = """
 <!DOCTYPE html>
 <html>
@@ -257,6 +3151,22 @@ def create_popup_html():
         .channel-item:hover {
             background-color: #242425;
         }
+        .list-controls {
+            display: flex;
+            gap: 5px;
+        }
+        .channel-rows.virtual {
+            max-height: 340px;
+            overflow-y: auto;
+        }
+        .channel-rows.virtual #channelRowsContent {
+            box-sizing: border-box;
+        }
+        .channel-rows.virtual .channel-item {
+            height: 34px;
+            box-sizing: border-box;
+            overflow: hidden;
+        }
         .login-section { 
             text-align: center; 
             margin-bottom: 15px; 
@@ -281,7 +3191,17 @@ def create_popup_html():
 
             <div class="channel-list" id="channelList">
                 <h3>Accumulated Points:</h3>
-                <!-- Channel points will be listed here -->
+                <div class="list-controls">
+                    <input type="text" id="channelFilter" placeholder="Filter channels">
+                    <select id="channelSort">
+                        <option value="name">Sort by name</option>
+                        <option value="balance">Sort by balance</option>
+                    </select>
+                </div>
+                <div class="channel-rows" id="channelRows">
+                    <!-- Channel points will be listed here -->
+                    <div id="channelRowsContent"></div>
+                </div>
             </div>
 
             <div class="send-points-section">
@@ -300,27 +3220,95 @@ def create_popup_html():
 </html>
     """
     
-    with open("twitch_points_manager/popup.html", "w") as f:
-        f.write(popup_html)
+    build.write("twitch_points_manager/popup.html", popup_html)
 
-def create_popup_js():
+def create_popup_js(build, bridge_port=BRIDGE_PORT):
     popup_js = """
 let twitchAuth = null;
 let channels = {};
 
+const STORAGE_PREFIX = 'channel:';
+const BRIDGE_URL = 'ws://127.0.0.1:__BRIDGE_PORT__';
+
+function connectBridge() {
+    const status = document.getElementById('authStatus');
+    const bridge = new WebSocket(BRIDGE_URL);
+    
+    bridge.onopen = () => {
+        status.textContent = 'Connected to Python app';
+        showMainContent();
+    };
+    bridge.onmessage = message => handleBridgeEvent(JSON.parse(message.data));
+    bridge.onclose = () => {
+        status.textContent = 'Python app not running';
+    };
+}
+
+// Events pushed by the Python manager
+function handleBridgeEvent(event) {
+    if (event.type === 'snapshot') {
+        Object.entries(event.channels).forEach(([channel, state]) => {
+            channels[channel] = Object.assign(channels[channel] || {}, state);
+        });
+    } else {
+        const data = channels[event.channel] || (channels[event.channel] = { points: 0 });
+        if (event.points !== undefined) data.points = event.points;
+        if (event.status !== undefined) data.status = event.status;
+        if (event.type === 'claim') data.claims = (data.claims || 0) + 1;
+    }
+    updateChannelList();
+}
+
+function channelsFromStorage(items) {
+    const found = {};
+    Object.entries(items).forEach(([key, value]) => {
+        if (key.startsWith(STORAGE_PREFIX)) {
+            found[key.slice(STORAGE_PREFIX.length)] = value;
+        }
+    });
+    return found;
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     // Check if already logged in
-    chrome.storage.local.get(['twitchAuth', 'channels'], function(result) {
+    chrome.storage.local.get(null, function(result) {
         if (result.twitchAuth) {
             twitchAuth = result.twitchAuth;
-            channels = result.channels || {};
+            channels = channelsFromStorage(result);
             showMainContent();
             updateChannelList();
         }
     });
+    
+    connectBridge();
+    
+    // Sorting, filtering and scrolling only re-run the keyed render
+    document.getElementById('channelFilter').addEventListener('input', event => {
+        listView.filter = event.target.value.trim().toLowerCase();
+        updateChannelList();
+    });
+    document.getElementById('channelSort').addEventListener('change', event => {
+        listView.sort = event.target.value;
+        updateChannelList();
+    });
+    document.getElementById('channelRows').addEventListener('scroll', event => {
+        if (event.target.classList.contains('virtual')) updateChannelList();
+    });
+    
+    // Pick up balances written by the Twitch tabs while the popup is open
+    chrome.storage.onChanged.addListener((changes, area) => {
+        if (area !== 'local') return;
+        const updated = channelsFromStorage(
+            Object.fromEntries(Object.entries(changes).map(([key, change]) => [key, change.newValue])));
+        if (Object.keys(updated).length) {
+            Object.assign(channels, updated);
+            updateChannelList();
+        }
+    });
 
     // Login button listener
-    document.getElementById('loginButton').addEventListener('click', async () => {
+    const loginButton = document.getElementById('loginButton');
+    if (loginButton) loginButton.addEventListener('click', async () => {
         const username = document.getElementById('twitchUsername').value;
         const password = document.getElementById('twitchPassword').value;
         
@@ -350,7 +3338,7 @@ document.addEventListener('DOMContentLoaded', function() {
             });
             
             channels[channelName] = { points: 0 };
-            chrome.storage.local.set({ channels: channels });
+            chrome.storage.local.set({ [STORAGE_PREFIX + channelName]: channels[channelName] });
             updateChannelList();
             channelInput.value = '';
         }
@@ -378,36 +3366,120 @@ function showMainContent() {
     document.getElementById('mainContent').style.display = 'block';
 }
 
+// Lists longer than this only render the rows in view
+const VIRTUALIZE_THRESHOLD = 200;
+const ROW_HEIGHT = 34;
+const OVERSCAN = 5;
+
+// Rows and options are keyed by channel and reused between renders
+const channelRows = new Map();
+const channelOptions = new Map();
+const listView = { filter: '', sort: 'name' };
+let renderQueued = false;
+
+// Coalesce bursts of updates into one render per frame
 function updateChannelList() {
-    const channelList = document.getElementById('channelList');
-    const channelSelect = document.getElementById('channelSelect');
+    if (renderQueued) return;
+    renderQueued = true;
+    requestAnimationFrame(() => {
+        renderQueued = false;
+        renderChannelList();
+    });
+}
+
+function renderChannelList() {
+    syncChannelOptions();
     
-    // Clear existing content
-    channelList.innerHTML = '<h3>Accumulated Points:</h3>';
-    channelSelect.innerHTML = '';
+    const viewport = document.getElementById('channelRows');
+    const content = document.getElementById('channelRowsContent');
+    const names = visibleChannels();
+    const virtual = names.length > VIRTUALIZE_THRESHOLD;
+    viewport.classList.toggle('virtual', virtual);
     
-    // Add channels to both list and select
-    Object.entries(channels).forEach(([channel, data]) => {
-        // Add to points list
-        const channelDiv = document.createElement('div');
-        channelDiv.className = 'channel-item';
-        channelDiv.innerHTML = `
-            <span>${channel}</span>
-            <span>${formatPoints(data.points)} Channel Points</span>
-        `;
+    if (!virtual) {
+        content.style.height = '';
+        content.style.paddingTop = '';
+        reconcileRows(content, names);
+        return;
+    }
+    
+    const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const count = Math.ceil(viewport.clientHeight / ROW_HEIGHT) + OVERSCAN * 2;
+    content.style.height = names.length * ROW_HEIGHT + 'px';
+    content.style.paddingTop = first * ROW_HEIGHT + 'px';
+    reconcileRows(content, names.slice(first, first + count));
+}
+
+function visibleChannels() {
+    const names = Object.keys(channels).filter(name => !listView.filter || name.includes(listView.filter));
+    if (listView.sort === 'balance') {
+        names.sort((a, b) => (channels[b].points || 0) - (channels[a].points || 0) || a.localeCompare(b));
+    } else {
+        names.sort();
+    }
+    return names;
+}
+
+// Only rows that are out of place get moved, extra rows get detached
+function reconcileRows(container, names) {
+    names.forEach((channel, index) => {
+        const row = channelRow(channel);
+        const current = container.children[index];
+        if (current !== row) {
+            container.insertBefore(row, current || null);
+        }
+    });
+    while (container.children.length > names.length) {
+        container.lastChild.remove();
+    }
+}
+
+function channelRow(channel) {
+    let row = channelRows.get(channel);
+    if (!row) {
+        const element = document.createElement('div');
+        element.className = 'channel-item';
+        const name = document.createElement('span');
+        name.textContent = channel;
+        const points = document.createElement('span');
+        element.append(name, points);
         
         // Add double-click handler
-        channelDiv.addEventListener('dblclick', () => {
+        element.addEventListener('dblclick', () => {
             chrome.tabs.create({ url: `https://twitch.tv/${channel}` });
         });
         
-        channelList.appendChild(channelDiv);
-        
-        // Add to select dropdown
+        row = { element: element, points: points, text: null };
+        channelRows.set(channel, row);
+    }
+    
+    // Touch the DOM only when the displayed text actually changed
+    const data = channels[channel];
+    const status = data.status && data.status !== 'watching' ? ` (${data.status})` : '';
+    const text = `${formatPoints(data.points || 0)} Channel Points${status}`;
+    if (row.text !== text) {
+        row.points.textContent = text;
+        row.text = text;
+    }
+    return row.element;
+}
+
+function syncChannelOptions() {
+    const channelSelect = document.getElementById('channelSelect');
+    Object.keys(channels).forEach(channel => {
+        if (channelOptions.has(channel)) return;
         const option = document.createElement('option');
         option.value = channel;
         option.textContent = channel;
         channelSelect.appendChild(option);
+        channelOptions.set(channel, option);
+    });
+    channelOptions.forEach((option, channel) => {
+        if (!(channel in channels)) {
+            option.remove();
+            channelOptions.delete(channel);
+            channelRows.delete(channel);
+        }
     });
 }
 
@@ -427,60 +3499,97 @@ function formatPoints(points) {
 }
     """
     
-    with open("twitch_points_manager/popup.js", "w") as f:
-        f.write(popup_js)
+    build.write("twitch_points_manager/popup.js", popup_js.replace('__BRIDGE_PORT__', str(bridge_port)))
 
-def create_content_js():
-    content_js = """
-// Handle point collection
-function collectChannelPoints() {
-    const button = document.querySelector('[aria-label="Claim Bonus"]');
-    if (button) {
-        button.click();
-        updatePointsPool();
-    }
+def create_content_js(build):
+    content_js = page_script("""
+// Polling happens in the background worker on chrome.alarms. A tab does no
+// work of its own between checks, it only answers the worker's 'check'
+// message and only reports a balance when it changed.
+let lastReported = null;
+const checkStats = { checks: 0, reports: 0, since: Date.now() };
+__PAGE_HELPERS__
+
+function currentChannel() {
+    return window.location.pathname.split('/')[1].toLowerCase();
 }
 
-// Update points pool
-function updatePointsPool() {
-    // Try multiple selectors for point detection
-    const pointsElement = document.querySelector('[data-test-selector="balance-string"], [data-test-selector="copo-balance-string"], .channel-points-icon + div');
-    
-    if (pointsElement) {
-        // Remove all non-numeric characters and parse
-        const points = parseInt(pointsElement.textContent.replace(/[^0-9]/g, ''));
-        if (!isNaN(points)) {
-            chrome.storage.local.get(['channels'], result => {
-                const channels = result.channels || {};
-                const channelName = window.location.pathname.split('/')[1];
-                channels[channelName] = { points: points };
-                chrome.storage.local.set({ channels: channels });
-            });
-        }
+function readPoints() {
+    // Fall back to the older balance markup when the current one is missing
+    const points = readBalance();
+    if (points !== null) return points;
+    const pointsElement = document.querySelector('[data-test-selector="copo-balance-string"], .channel-points-icon + div');
+    return pointsElement ? parseBalance(pointsElement.textContent) : null;
+}
+
+// Headless tabs are kept playing, unmuted at 5% volume
+function maintainPlayback() {
+    const videoElement = document.querySelector(selectors.video);
+    const muteButton = document.querySelector('[aria-label="Mute (m)"], [aria-label="Unmute (m)"]');
+    if (!videoElement) return;
+    
+    if (muteButton && muteButton.getAttribute('aria-label') === 'Unmute (m)') {
+        muteButton.click();
+    }
+    if (videoElement.muted || videoElement.volume !== 0.05) {
+        videoElement.muted = false;
+        videoElement.volume = 0.05;
+    }
+    if (videoElement.paused) {
+        videoElement.play().catch(() => {});
     }
 }
 
-// Update points more frequently
-setInterval(updatePointsPool, 2000);
+// Claim the bonus if it is showing, returns the balance if it changed
+function checkTab(headless) {
+    checkStats.checks++;
+    if (headless) maintainPlayback();
+    
+    const button = document.querySelector(selectors.claim_button);
+    if (button) button.click();
+    
+    const points = readPoints();
+    const channel = currentChannel();
+    if (points === null || !channel) return null;
+    if (lastReported && lastReported.channel === channel && lastReported.points === points) {
+        return null;
+    }
+    
+    lastReported = { channel: channel, points: points };
+    checkStats.reports++;
+    return { channel: channel, points: points };
+}
 
-// Listen for messages from popup
+// Listen for messages from the background worker and popup
 chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
-    if (request.action === 'collectPoints') {
-        collectChannelPoints();
+    if (request.action === 'check' || request.action === 'collectPoints') {
+        sendResponse(checkTab(request.headless));
     }
     else if (request.action === 'sendPoints') {
         // This would need to integrate with Twitch's point giving system
         console.log(`Sending ${request.points} points to ${request.username}`);
     }
+    else if (request.action === 'getCheckStats') {
+        const minutes = (Date.now() - checkStats.since) / 60000;
+        sendResponse(Object.assign({
+            checksPerMinute: checkStats.checks / minutes,
+            reportsPerMinute: checkStats.reports / minutes
+        }, checkStats));
+    }
 });
-    """
+    """)
     
-    with open("twitch_points_manager/content.js", "w") as f:
-        f.write(content_js)
+    build.write("twitch_points_manager/content.js", content_js)
 
-def create_background_js():
+def create_background_js(build):
     background_js = """
-let headlessTabs = {};
+// One alarm drives every Twitch tab instead of timers running in each tab.
+// Chrome fires alarms at most every 30 seconds.
+const POLL_ALARM = 'pollTabs';
+const POLL_MINUTES = 0.5;
+
+// Each channel's balance lives under its own storage key
+const STORAGE_PREFIX = 'channel:';
 
 chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     switch(request.action) {
@@ -507,6 +3616,17 @@ async function handleTwitchLogin(request, sendResponse) {
     });
 }
 
+// The service worker is shut down between alarms and loses its globals, so
+// the channel -> tab id map is kept in storage
+async function loadHeadlessTabs() {
+    const { headlessTabs } = await chrome.storage.local.get('headlessTabs');
+    return headlessTabs || {};
+}
+
+function saveHeadlessTabs(headlessTabs) {
+    return chrome.storage.local.set({ headlessTabs: headlessTabs });
+}
+
 async function createHeadlessTab(channel) {
     // Create a hidden tab for the channel
     const tab = await chrome.tabs.create({
@@ -515,80 +3635,62 @@ async function createHeadlessTab(channel) {
     });
 
     // Store reference to headless tab
+    const headlessTabs = await loadHeadlessTabs();
     headlessTabs[channel] = tab.id;
+    await saveHeadlessTabs(headlessTabs);
+}
 
-    // Initialize tab with required settings
-    chrome.scripting.executeScript({
-        target: { tabId: tab.id },
-        function: setupHeadlessTab
-    });
+function schedulePolling() {
+    chrome.alarms.create(POLL_ALARM, { periodInMinutes: POLL_MINUTES });
 }
 
-function setupHeadlessTab() {
-    // Initial setup with retry mechanism
-    const setupInterval = setInterval(() => {
-        const videoElement = document.querySelector('video');
-        const muteButton = document.querySelector('[aria-label="Mute (m)"]');
-        
-        if (videoElement && muteButton) {
-            // Unmute the stream if muted
-            if (muteButton.getAttribute('aria-label') === 'Unmute (m)') {
-                muteButton.click();
+// Ask the tabs for claims and balance changes, then store what changed in one write
+async function pollTabs(tabIds) {
+    const headless = new Set(Object.values(await loadHeadlessTabs()));
+    const tabs = await chrome.tabs.query({ url: 'https://*.twitch.tv/*' });
+    const updates = {};
+    
+    await Promise.all(tabs.filter(tab => !tabIds || tabIds.includes(tab.id)).map(async tab => {
+        try {
+            const report = await chrome.tabs.sendMessage(tab.id, {
+                action: 'check',
+                headless: headless.has(tab.id)
+            });
+            if (report) {
+                updates[STORAGE_PREFIX + report.channel] = { points: report.points, updated: Date.now() };
             }
-            
-            // Set volume to 5%
-            videoElement.volume = 0.05;
-            videoElement.muted = false;
-            videoElement.play();
-            
-            clearInterval(setupInterval);
-            
-            // Start point collection
-            startPointCollection();
+        } catch (e) {
+            // No content script in the tab yet, it gets checked next time
         }
-    }, 2000);
+    }));
+    
+    if (Object.keys(updates).length) {
+        await chrome.storage.local.set(updates);
+    }
 }
 
-function startPointCollection() {
-    setInterval(() => {
-        // Check and maintain volume/mute settings
-        const videoElement = document.querySelector('video');
-        const muteButton = document.querySelector('[aria-label="Mute (m)"]');
-        
-        if (videoElement && muteButton) {
-            if (videoElement.muted || videoElement.volume !== 0.05) {
-                videoElement.muted = false;
-                videoElement.volume = 0.05;
-            }
-            
-            if (muteButton.getAttribute('aria-label') === 'Unmute (m)') {
-                muteButton.click();
-            }
-        }
+chrome.alarms.onAlarm.addListener(alarm => {
+    if (alarm.name === POLL_ALARM) pollTabs();
+});
 
-        // Collect points
-        const button = document.querySelector('[aria-label="Claim Bonus"]');
-        if (button) {
-            button.click();
-            updatePoints();
-        }
-    }, 5000);
-}
+// Set up a headless tab's playback as soon as it has loaded
+chrome.tabs.onUpdated.addListener(async (tabId, changeInfo) => {
+    if (changeInfo.status !== 'complete') return;
+    const headlessTabs = await loadHeadlessTabs();
+    if (Object.values(headlessTabs).includes(tabId)) pollTabs([tabId]);
+});
 
-function updatePoints() {
-    const pointsElement = document.querySelector('[data-test-selector="copo-balance-string"]');
-    if (pointsElement) {
-        const points = parseInt(pointsElement.textContent.replace(/[^0-9]/g, ''));
-        chrome.storage.local.get(['channels'], result => {
-            const channels = result.channels || {};
-            const channelName = window.location.pathname.split('/')[1];
-            channels[channelName] = { points: points };
-            chrome.storage.local.set({ channels: channels });
-        });
+chrome.tabs.onRemoved.addListener(async tabId => {
+    const headlessTabs = await loadHeadlessTabs();
+    const channel = Object.keys(headlessTabs).find(name => headlessTabs[name] === tabId);
+    if (channel) {
+        delete headlessTabs[channel];
+        await saveHeadlessTabs(headlessTabs);
     }
-}
+});
 
-function sendChannelPoints(request) {
+async function sendChannelPoints(request) {
+    const headlessTabs = await loadHeadlessTabs();
     chrome.tabs.sendMessage(headlessTabs[request.channel], {
         action: 'sendPoints',
         recipient: request.recipient,
@@ -596,19 +3698,22 @@ function sendChannelPoints(request) {
     });
 }
 
-// Cleanup on extension update/reload
-chrome.runtime.onStartup.addListener(() => {
+chrome.runtime.onInstalled.addListener(schedulePolling);
+
+// Cleanup on browser restart, tab ids from the last session are stale
+chrome.runtime.onStartup.addListener(async () => {
+    const headlessTabs = await loadHeadlessTabs();
     Object.values(headlessTabs).forEach(tabId => {
-        chrome.tabs.remove(tabId);
+        chrome.tabs.remove(tabId).catch(() => {});
     });
-    headlessTabs = {};
+    await saveHeadlessTabs({});
+    schedulePolling();
 });
     """
     
-    with open("twitch_points_manager/background.js", "w") as f:
-        f.write(background_js)
+    build.write("twitch_points_manager/background.js", background_js)
 
-def create_placeholder_icons():
+def create_placeholder_icons(build):
     # Create images directory
     os.makedirs("twitch_points_manager/images", exist_ok=True)
     
@@ -621,49 +3726,70 @@ def create_placeholder_icons():
     
     # Create icon files
     for size, data in icon_data.items():
-        with open(f"twitch_points_manager/images/icon{size}.png", "wb") as f:
-            f.write(data)
+        build.write(f"twitch_points_manager/images/icon{size}.png", data)
 
-def create_extension_zip():
-    with zipfile.ZipFile("twitch_points_manager.zip", "w") as zf:
-        for root, dirs, files in os.walk("twitch_points_manager"):
-            for file in files:
+def create_extension_zip(build):
+    if not build.changed and os.path.exists(EXTENSION_ZIP):
+        return False
+    
+    # Sorted entries with fixed timestamps and permissions, so the zip only
+    # changes when an asset does
+    with zipfile.ZipFile(EXTENSION_ZIP, "w", zipfile.ZIP_DEFLATED) as zf:
+        for root, dirs, files in sorted(os.walk(EXTENSION_DIR)):
+            dirs.sort()
+            for file in sorted(files):
                 file_path = os.path.join(root, file)
-                arc_name = os.path.relpath(file_path, "twitch_points_manager")
-                zf.write(file_path, arc_name)
+                info = zipfile.ZipInfo(os.path.relpath(file_path, EXTENSION_DIR).replace(os.sep, '/'), ZIP_DATE_TIME)
+                info.external_attr = 0o644 << 16
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(file_path, 'rb') as f:
+                    zf.writestr(info, f.read())
+    return True
 
-def main():
-    print("Creating Twitch Points Manager Extension...")
-    
-    # Create extension files
+def build_extension(minify=None, bridge_port=BRIDGE_PORT):
+    """Regenerate the extension, skipping everything that is up to date"""
+    build = ExtensionBuild(minify=minify)
     create_directory_structure()
-    create_manifest()
-    create_popup_html()
-    create_popup_js()
-    create_content_js()
-    create_background_js()
-    create_placeholder_icons()
-    create_extension_zip()
+    create_manifest(build)
+    create_popup_html(build)
+    create_popup_js(build, bridge_port)
+    create_content_js(build)
+    create_background_js(build)
+    create_placeholder_icons(build)
+    zipped = create_extension_zip(build)
+    build.save()
     
-    print("\nExtension created successfully!")
+    if build.changed:
+        print(f"Extension rebuilt: {', '.join(os.path.relpath(p, EXTENSION_DIR) for p in build.changed)}")
+    if zipped:
+        print(f"Packed {EXTENSION_ZIP}")
+    if not build.changed and not zipped:
+        print("Extension up to date")
+    return build
+
+def main(config_path='channels.json', minify=None, bridge_port=BRIDGE_PORT):
+    # Only rewrites files (and the zip) whose generated content changed
+    build_extension(minify=minify, bridge_port=bridge_port)
     
     # Initialize the point manager
-    manager = TwitchPointsManager()
+    manager = TwitchPointsManager(bridge_port=bridge_port)
     
-    # Authenticate first
-    if not manager.authenticate():
+    # Authenticate first, unless a saved session is still valid
+    if not manager.ensure_session():
         print("Failed to authenticate. Please try again.")
         return
     
-    # Get cookies from authenticated session
-    cookies = manager.auth_driver.get_cookies()
-    
     try:
-        # Start monitoring channels
-        channels = ['myth']  # You can load this from storage/config
-        manager.start(channels, cookies)
+        # Start monitoring channels, edits to the file are applied live
+        if not os.path.exists(config_path):
+            with open(config_path, 'w') as f:
+                json.dump(['myth'], f, indent=2)
+        channels = load_channels(config_path)
+        manager.start(channels)
+        manager.start_thread(manager.watch_config, config_path)
         
-        print(f"\nMonitoring channels: {', '.join(channels)}")
+        print(f"\nMonitoring channels: {', '.join(channels)} (started in {time.perf_counter() - STARTED_AT:.2f}s)")
+        print(f"Edit {config_path} to add or remove channels")
         print("Press Ctrl+C to stop")
         
         while True:
@@ -674,5 +3800,50 @@ def main():
         manager.stop()
         print("Point manager stopped")
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Twitch channel points auto-collector")
+    commands = parser.add_subparsers(dest='command')
+    
+    build = commands.add_parser('build-extension', help="only regenerate the Chrome extension")
+    run = commands.add_parser('run', help="build the extension and collect points (default)")
+    run.add_argument('--config', default='channels.json', help="channel list to watch")
+    
+    # Unset means whatever the previous build used
+    for command in (build, run):
+        command.add_argument('--minify', action='store_true', default=None,
+                             help="minify the generated JavaScript")
+        command.add_argument('--no-minify', dest='minify', action='store_false',
+                             help="write the generated JavaScript as is")
+        command.add_argument('--bridge-port', type=int, default=BRIDGE_PORT,
+                             help="port the extension popup connects to")
+    
+    memory = commands.add_parser('compare-memory', help="compare dedicated vs shared browser memory")
+    memory.add_argument('channels', nargs='*', default=['myth'])
+    
+    blocking = commands.add_parser('compare-blocking', help="compare page traffic with and without blocking")
+    blocking.add_argument('channels', nargs='*', default=['myth'])
+    
+    benchmark = commands.add_parser('benchmark', help="run against a local fake Twitch")
+    benchmark.add_argument('channels', type=int)
+    benchmark.add_argument('seconds', type=int)
+    benchmark.add_argument('interval', type=int)
+    benchmark.add_argument('--transport', choices=['browser', 'http'], default='browser')
+    benchmark.add_argument('--live-only', action='store_true', help="check liveness against the stand-in GQL")
+    
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args(sys.argv[1:])
+    if args.command == 'build-extension':
+        build_extension(minify=args.minify, bridge_port=args.bridge_port)
+        print(f"Done in {time.perf_counter() - STARTED_AT:.2f}s")
+    elif args.command == 'compare-memory':
+        compare_memory(args.channels)
+    elif args.command == 'compare-blocking':
+        compare_blocking(args.channels)
+    elif args.command == 'benchmark':
+        run_benchmark(args.channels, args.seconds, args.interval, transport=args.transport,
+                      live_only=args.live_only)
+    else:
+        main(getattr(args, 'config', 'channels.json'), getattr(args, 'minify', None),
+             getattr(args, 'bridge_port', BRIDGE_PORT))
\ No newline at end of file
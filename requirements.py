@@ -1,27 +1,59 @@
 import subprocess
 import sys
+import time
+try:
+    from importlib import metadata
+except ImportError:
+    # Python 3.7 has no importlib.metadata, setuptools ships with pip there
+    metadata = None
+    import pkg_resources
 
-def install_requirements():
-    requirements = [
-        'selenium',
-        'undetected-chromedriver',
-        'websocket-client',
-        'requests',
-        'python-dotenv'
-    ]
-    
-    print("Installing required packages...")
-    
-    for package in requirements:
-        print(f"Installing {package}...")
+REQUIREMENTS = [
+    'selenium',
+    'undetected-chromedriver',
+    'websocket-client',
+    'requests',
+    'python-dotenv',
+    'psutil'
+]
+
+def is_installed(package):
+    if metadata is None:
         try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-            print(f"Successfully installed {package}")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to install {package}: {e}")
+            pkg_resources.get_distribution(package)
+        except pkg_resources.DistributionNotFound:
             return False
+        return True
+    try:
+        metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return False
+    return True
+
+def missing_requirements(requirements=REQUIREMENTS):
+    """Packages from the list that are not installed yet"""
+    missing = []
+    for package in requirements:
+        if not is_installed(package):
+            missing.append(package)
+    return missing
+
+def install_requirements():
+    started = time.perf_counter()
+    missing = missing_requirements()
+    if not missing:
+        print(f"All requirements already installed ({time.perf_counter() - started:.2f}s)")
+        return True
+    
+    # One pip call so the resolver sees every package at once
+    print(f"Installing {', '.join(missing)}...")
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install"] + missing)
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to install requirements: {e}")
+        return False
     
-    print("\nAll requirements installed successfully!")
+    print(f"\nAll requirements installed successfully! ({time.perf_counter() - started:.2f}s)")
     return True
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+import importlib.util
+import os
+import unittest
+
+# The script's file name isn't importable, load it by path
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      'TwitchAFK - Channel Points Auto-Collector\\setup.py')
+spec = importlib.util.spec_from_file_location('twitchafk', SCRIPT)
+twitchafk = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(twitchafk)
+
+
+class LivenessTest(unittest.TestCase):
+    def setUp(self):
+        self.server = twitchafk.FakeTwitchServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_batched_lookup_follows_set_live(self):
+        checker = twitchafk.LivenessChecker(gql_url=f'{self.server.url}/gql', ttl=0)
+        self.server.set_live('bob', False)
+        self.assertEqual(checker.live_channels(['alice', 'bob']), {'alice'})
+
+        self.server.set_live('bob')
+        self.server.set_live('alice', False)
+        self.assertEqual(checker.live_channels(['alice', 'bob']), {'bob'})
+
+
+class HttpTransportTest(unittest.TestCase):
+    def setUp(self):
+        # Every bonus interval starts with a claimable bonus
+        self.server = twitchafk.FakeTwitchServer(bonus_interval=600)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.manager = twitchafk.TwitchPointsManager(
+            bridge_port=None, base_url=self.server.url, gql_url=f'{self.server.url}/gql',
+            transport='http', ledger=twitchafk.PointsLedger(':memory:'))
+        self.addCleanup(self.manager.stop)
+        self.manager.watchdogs['alice'] = twitchafk.PageWatchdog('Alice')
+
+    def test_claim_balance_and_presence(self):
+        transport = twitchafk.HttpTransport(self.manager, 'alice')
+        transport.open()
+        self.assertEqual(transport.spade_url, f'{self.server.url}/spade')
+
+        self.assertTrue(transport.check())
+        stats = self.server.stats['alice']
+        self.assertEqual(stats['claimed'], 1)
+        self.assertEqual(stats['minutes'], 1)
+        self.assertEqual(self.manager.ledger.balances['alice'], 1050)
+        self.assertEqual(self.manager.watchdogs['alice'].state, 'ok')
+
+        # Nothing left to claim, presence is still reported
+        self.assertFalse(transport.check())
+        self.assertEqual(stats['minutes'], 2)
+        self.assertEqual(self.manager.ledger.balances['alice'], 1050)
+
+    def test_offline_channel_sends_no_presence(self):
+        self.server.set_live('alice', False)
+        transport = twitchafk.HttpTransport(self.manager, 'alice')
+        transport.open()
+        transport.check()
+        self.assertEqual(self.server.stats['alice']['minutes'], 0)
+        self.assertEqual(self.manager.page_states['alice']['offline'], True)
+        self.assertEqual(self.manager.watchdogs['alice'].state, 'offline')
+
+
+if __name__ == '__main__':
+    unittest.main()